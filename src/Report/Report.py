@@ -6,7 +6,7 @@ from screeninfo import get_monitors
 import sys
 import codecs
 
-sys.stdout = codecs.getwriter("utf-8")(sys.stdout.buffer)
+import job_workspace
 
 def get_screen_size():
     """Get the primary monitor screen size."""
@@ -77,32 +77,34 @@ def merge_pdfs(pdf_list, output_path, elongated_files=[], normalize_size=True):
     finally:
         pdf_merger.close()
 
-if __name__ == "__main__":
-    # List of PDF files to merge
+def main(workspace=None):
+    """Merge the report pages into src/Report/report.pdf of the job workspace."""
+    workspace = job_workspace.get(workspace)
+
+    # Generated pages of this job
+    elongated_pdfs = [
+        workspace.path("data/reports/template_PDF/brand marketing.pdf"),
+        workspace.path("data/reports/template_PDF/content marketing.pdf"),
+        workspace.path("data/reports/template_PDF/social media marketing.pdf")
+    ]
+
+    # List of PDF files to merge; the report_stats pages are shared
     pdf_files = [
-        "src/Report/1updated.pdf",
+        workspace.path("src/Report/1updated.pdf"),
         "data/reports/report_stats/2.pdf",
         "data/reports/report_stats/3.pdf",
         "data/reports/report_stats/objective.pdf",
-        "data/reports/template_PDF/brand marketing.pdf",
-        "data/reports/template_PDF/content marketing.pdf",
-        "data/reports/template_PDF/social media marketing.pdf",
+        *elongated_pdfs,
         "data/reports/report_stats/last.pdf"
     ]
 
-    elongated_pdfs = [
-        "data/reports/template_PDF/brand marketing.pdf",
-        "data/reports/template_PDF/content marketing.pdf",
-        "data/reports/template_PDF/social media marketing.pdf"
-    ]
-
     # Define output directory and strict file name
-    output_dir = "src/Report"
-    os.makedirs(output_dir, exist_ok=True)  # Create the directory if it doesn't exist
+    output_dir = workspace.makedirs("src/Report")  # Create the directory if it doesn't exist
     output_file = os.path.join(output_dir, "report.pdf")  # Enforce strict file name as report.pdf
 
     # Merge the PDFs and save the result in the specified directory
     merge_pdfs(pdf_files, output_file, elongated_files=elongated_pdfs)
 
-
-
+if __name__ == "__main__":
+    sys.stdout = codecs.getwriter("utf-8")(sys.stdout.buffer)
+    main()
@@ -1,8 +1,11 @@
+import os
 import sys
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
 from io import BytesIO
 
+import job_workspace
+
 def create_overlay_pdf(text, x, y, output_overlay_pdf, page_width, page_height, max_width):
     packet = BytesIO()
     can = canvas.Canvas(packet, pagesize=(page_width, page_height))
@@ -53,16 +56,15 @@ def merge_pdfs(input_pdf, overlay_pdf, output_pdf):
     with open(output_pdf, "wb") as output_file:
         writer.write(output_file)
 
-if __name__ == "__main__":
-    # Retrieve company_name from command-line argument or use default
-    if len(sys.argv) > 1:
-        company_name = sys.argv[1]
-    else:
-        company_name = "Default_Company"
+def main(company_name, workspace=None):
+    """Stamp the company name on the cover page of the report (written to the job workspace)."""
+    workspace = job_workspace.get(workspace)
 
+    # The cover template is shared, the stamped copies belong to the job
     input_pdf_path = "data/reports/report_stats/1.pdf"
-    overlay_pdf_path = "src/Report/overlay_test.pdf"
-    output_pdf_path = "src/Report/1updated.pdf"
+    report_dir = workspace.makedirs("src/Report")
+    overlay_pdf_path = os.path.join(report_dir, "overlay_test.pdf")
+    output_pdf_path = os.path.join(report_dir, "1updated.pdf")
 
     # Load the original PDF to get its dimensions
     reader = PdfReader(input_pdf_path)
@@ -83,15 +85,11 @@ if __name__ == "__main__":
 
     print(f"Generated PDF saved as {output_pdf_path} with company name: {company_name}")
 
+if __name__ == "__main__":
+    # Retrieve company_name from command-line argument or use default
+    if len(sys.argv) > 1:
+        company_name = sys.argv[1]
+    else:
+        company_name = "Default_Company"
 
-
-
-
-
-
-
-
-
-
-
-
+    main(company_name)
@@ -1,3 +1,5 @@
+import logging
+import os
 import subprocess
 import sys
 
@@ -11,11 +13,17 @@ def install_requirements():
 
 def run_python_file(file_name, company_name):
     """Run a Python script with subprocess."""
+    from pipeline import HELPERS_DIR
+
+    # The stage scripts import the shared helpers the pipeline makes importable
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [HELPERS_DIR, env.get("PYTHONPATH")]))
     try:
         result = subprocess.run(
             [sys.executable, file_name, company_name],  
             capture_output=True,
-            text=True
+            text=True,
+            env=env
         )
 
         if result.returncode == 0:
@@ -25,17 +33,40 @@ def run_python_file(file_name, company_name):
     except Exception as e:
         return "error", f"An error occurred while running {file_name}: {str(e)}"
 
+def run_in_process(company_name, use_cache=True):
+    """Run every stage in this interpreter so imports and data are shared."""
+    try:
+        from pipeline import run_pipeline
+        run_pipeline(company_name, use_cache=use_cache)
+        return "success", ""
+    except Exception as e:
+        logging.exception("The pipeline failed.")
+        return "error", f"An error occurred while running the pipeline: {str(e)}"
+
 def main():
-    if len(sys.argv) > 1:
-        company_name = sys.argv[1]
+    # "--subprocess" runs every stage in its own interpreter as before,
+    # "--no-cache" re-runs every stage even if its inputs are unchanged
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    use_subprocess = "--subprocess" in flags
+
+    if args:
+        company_name = args[0]
     else:
         company_name = "Default_Company"
 
     install_requirements()  # Install requirements before execution
 
+    if not use_subprocess:
+        status, message = run_in_process(company_name, use_cache="--no-cache" not in flags)
+        if status == "error":
+            print(message)
+            return
+        write_done_status()
+        return
+
     scripts = [
-        'src/input_analysis/product-analysis/product_analysis.py',
-        'src/input_analysis/competitor-analysis/competitor_analysis.py',
+        'src/input_analysis/image_analysis.py',
         'src/input_analysis/Standarddeviation.py',
         'src/input_analysis/renamebranding.py',
         'src/input_analysis/path.py',
@@ -55,9 +86,13 @@ def main():
         else:
             print(f"{script} executed successfully.")
 
+    write_done_status()
+
+def write_done_status():
     # ✅ After all scripts run successfully, mark the status as "done"
     with open("src/Report/status.txt", "w") as f:
         f.write("done")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     main()
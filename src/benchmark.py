@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+import fake_openai_server
+import pipeline
+import job_workspace
+
+# Sample uploads copied into the benchmark's workspace
+SAMPLE_IMAGE_DIRS = ("data/product", "data/competitor")
+
+# Report phase of every pipeline stage
+STAGE_PHASES = {
+    "image_analysis": "analysis",
+    "Standarddeviation": "sd_matrix",
+    "renamebranding": "text_splitting",
+    "path": "text_splitting",
+    "feedback": "feedback",
+    "brand_html": "html_render",
+    "content_html": "html_render",
+    "social_html": "html_render",
+    "brand_pdf": "screenshot",
+    "content_pdf": "screenshot",
+    "social_pdf": "screenshot",
+    "updated1": "pdf_merge",
+    "Report": "pdf_merge",
+}
+
+def current_rss():
+    """Resident set size of this process in bytes, or None when it cannot be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def cpu_seconds():
+    """CPU time of this process and its finished children."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+class StageProfiler:
+    """
+    Records wall-clock, CPU time and peak RSS of every stage of a run.
+
+    Peak RSS is sampled by a background thread. With more than one pipeline
+    worker, stages overlap and their CPU and memory figures include each other;
+    run with --workers 1 to attribute them to a single stage.
+    """
+
+    def __init__(self, sample_interval=0.01):
+        self.sample_interval = sample_interval
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._active_peaks = {}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            rss = current_rss()
+            if rss is None:
+                continue
+            with self._lock:
+                for name, peak in self._active_peaks.items():
+                    self._active_peaks[name] = max(peak, rss)
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        rss = current_rss()
+        with self._lock:
+            self._active_peaks[stage.name] = rss or 0
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = cpu_seconds() - cpu_start
+            with self._lock:
+                peak = max(self._active_peaks.pop(stage.name), current_rss() or 0)
+                self.stages[stage.name] = {
+                    "phase": STAGE_PHASES.get(stage.name, stage.name),
+                    "wall_seconds": wall,
+                    "cpu_seconds": cpu,
+                    "peak_rss_bytes": peak or None,
+                }
+
+    def close(self):
+        self._stop.set()
+        self._sampler.join()
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of a list of numbers."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+def summarize(samples):
+    return {
+        "p50": percentile(samples, 0.50),
+        "p95": percentile(samples, 0.95),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+def summarize_runs(runs):
+    """p50/p95 of every metric per stage, per phase and for the whole run."""
+    summary = {"total_wall_seconds": summarize([run["wall_seconds"] for run in runs]), "stages": {}, "phases": {}}
+    stage_names = [name for name in STAGE_PHASES if all(name in run["stages"] for run in runs)]
+    for name in stage_names:
+        summary["stages"][name] = {
+            metric: summarize([run["stages"][name][metric] or 0 for run in runs])
+            for metric in ("wall_seconds", "cpu_seconds", "peak_rss_bytes")
+        }
+    for phase in dict.fromkeys(STAGE_PHASES.values()):
+        names = [name for name in stage_names if STAGE_PHASES[name] == phase]
+        if names:
+            summary["phases"][phase] = {
+                # Stages of a phase may overlap, so wall time is a sum of stage times
+                "wall_seconds": summarize([sum(run["stages"][name]["wall_seconds"] for name in names) for run in runs]),
+                "cpu_seconds": summarize([sum(run["stages"][name]["cpu_seconds"] for name in names) for run in runs]),
+                "peak_rss_bytes": summarize([max(run["stages"][name]["peak_rss_bytes"] or 0 for name in names) for run in runs]),
+            }
+    return summary
+
+def seed_workspace(workspace):
+    """Copy the sample images into a fresh job workspace, so runs never write to the shared tree."""
+    for image_dir in SAMPLE_IMAGE_DIRS:
+        shutil.copytree(image_dir, workspace.path(image_dir))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the report pipeline against the local model stand-in.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of pipeline runs")
+    parser.add_argument("--company", default="Benchmark_Company", help="Company name used for the report")
+    parser.add_argument("--workers", type=int, default=None, help="Pipeline worker threads (1 isolates stages)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean latency of the stand-in model")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Latency jitter of the stand-in model")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of 429 responses")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--keep-workspace", action="store_true", help="Keep the job workspace with the report outputs")
+    args = parser.parse_args()
+
+    server, api_url = fake_openai_server.start_in_background(
+        port=0, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate
+    )
+    # Must be set before the stages import their HTTP client and response cache
+    os.environ["OPENAI_API_URL"] = api_url
+    os.environ["RESPONSE_CACHE"] = "0"
+
+    workers = args.workers or pipeline.DEFAULT_MAX_WORKERS
+    workspace = job_workspace.create()
+    seed_workspace(workspace)
+    runs = []
+    try:
+        for run_number in range(args.runs):
+            profiler = StageProfiler()
+            start = time.perf_counter()
+            try:
+                pipeline.run_pipeline(args.company, max_workers=workers, use_cache=False,
+                                      stage_context=profiler.measure, workspace=workspace)
+            finally:
+                profiler.close()
+            runs.append({"wall_seconds": time.perf_counter() - start, "stages": profiler.stages})
+            print(f"Run {run_number + 1}/{args.runs}: {runs[-1]['wall_seconds']:.2f}s", file=sys.stderr)
+    finally:
+        server.shutdown()
+        server.server_close()
+        if args.keep_workspace:
+            print(f"Report outputs kept in {workspace.root}", file=sys.stderr)
+        else:
+            job_workspace.remove(workspace.root)
+
+    results = {
+        "config": vars(args) | {"workers": workers},
+        "summary": summarize_runs(runs),
+        "runs": runs,
+    }
+    output = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Benchmark results saved to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,21 @@
 import base64
+import functools
 import os
 import sys
 import time
-from playwright.sync_api import sync_playwright
 from PIL import Image
-import pandas as pd
 
-def save_html_file(file_name, html_content):
-    with open(file_name, 'w') as file:
-        file.write(html_content)
+import job_workspace
+import table_store
 
-def encode_image_to_base64(image_path):
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+import browser
+
+__all__ = ["generate_html", "render_pdf", "main"]
 
 # Allow user to upload images for logo and product images
 logo_image_path = r"src/templates_images/Component 3.png"
 cola_image_path = r"src/templates_images/Frame 52.png"  
-# Encode images to base64
-logo_base64 = encode_image_to_base64(logo_image_path)
-cola_base64 = encode_image_to_base64(cola_image_path)
+
 def save_html_file(file_name, html_content):
     with open(file_name, 'w') as file:
         file.write(html_content)
@@ -34,9 +30,17 @@ def encode_image_to_base64(image_path):
     except Exception as e:
         print(f"Error encoding image {image_path}: {e}")
         return ""
+
+# Function to get a template image as base64, encoded once per process on first use
+@functools.lru_cache(maxsize=None)
+def template_image_base64(image_path):
+    return encode_image_to_base64(image_path)
+
 # Function to generate HTML for Social Media Marketing
 # Function to generate HTML for Brand Marketing
 def generate_brand_marketing_html(product_image_base64_1, competitor_image_base64_1, product_image_base64_2, competitor_image_base64_2, donts_html, suggestions_html, company_name):
+    logo_base64 = template_image_base64(logo_image_path)
+    cola_base64 = template_image_base64(cola_image_path)
     return f"""
 <!DOCTYPE html>
 <html lang="en">
@@ -259,6 +263,10 @@ def parse_cleaned_file_brand_marketing(file_path):
     with open(file_path, "r") as file:
         content = file.read()
 
+    return parse_cleaned_content_brand_marketing(content)
+
+# Function to parse the cleaned Don'ts and Suggestions text specific to Brand Marketing
+def parse_cleaned_content_brand_marketing(content):
     sections = content.split("==================================================")
     for section in sections:
         lines = section.strip().split("\n")
@@ -280,7 +288,7 @@ def parse_cleaned_file_brand_marketing(file_path):
     return "", ""
 
 # Function to process Brand Marketing and generate HTML
-def process_brand_marketing(data, base_image_dir, output_file, cleaned_file_path, company_name):
+def process_brand_marketing(data, base_image_dir, output_file, cleaned_file_path, company_name, cleaned_content=None):
     # Filter for Brand Marketing category
     brand_data = data[data["Category"] == "Brand Marketing"]
     
@@ -289,7 +297,10 @@ def process_brand_marketing(data, base_image_dir, output_file, cleaned_file_path
         return
 
     # Parse Don'ts and Suggestions
-    donts_html, suggestions_html = parse_cleaned_file_brand_marketing(cleaned_file_path)
+    if cleaned_content is not None:
+        donts_html, suggestions_html = parse_cleaned_content_brand_marketing(cleaned_content)
+    else:
+        donts_html, suggestions_html = parse_cleaned_file_brand_marketing(cleaned_file_path)
 
     # Ensure there are at least two rows
     if len(brand_data) < 2:
@@ -330,60 +341,50 @@ def process_brand_marketing(data, base_image_dir, output_file, cleaned_file_path
 
     print(f"HTML file for Brand Marketing has been saved as: {output_file}")
 
-# Main script for Content Marketing
-if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        company_name = sys.argv[1]  # The second argument passed will be the company_name
-    else:
-        company_name = "Default_Company"  # Default value if no argument is passed
-    # Load the Excel file
-    file_path = "Output File/excel/top_3_sd_results.xlsx"  # Replace with the path to your Excel file
-    data = pd.read_excel(file_path)
+# Function to generate the Brand Marketing HTML from the top SD results
+def generate_html(company_name, data=None, cleaned_content=None, workspace=None):
+    """
+    Generate the Brand Marketing HTML page.
+
+    The top SD results and the cleaned Don'ts/Suggestions are read from disk unless passed in;
+    the images, the cleaned file and the HTML page live in the job workspace.
+    """
+    workspace = job_workspace.get(workspace)
 
-    base_image_dir = ""  # Replace with the actual directory where your images are stored
+    # Load the top SD results from the table store
+    if data is None:
+        data = table_store.read_table("top_3_sd_results", workspace)
+
+    # Image names are relative to the job workspace
+    base_image_dir = workspace.root
 
     # Path to the cleaned file with Don'ts and Suggestions
-    cleaned_file_path = "data/output_generated_file/Product_output_cleaned.txt"  # Replace with the path to your cleaned file
+    cleaned_file_path = workspace.path("data/output_generated_file/Product_output_cleaned.txt")
 
     # Output HTML file
-    output_file = "src/templates/brand_marketing.html"
+    output_file = workspace.path("src/templates/brand_marketing.html")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
     # Generate HTML for Content Marketing
-    process_brand_marketing(data, base_image_dir, output_file, cleaned_file_path, company_name)
-
-# Force UTF-8 encoding for terminal output
-sys.stdout.reconfigure(encoding='utf-8')
+    process_brand_marketing(data, base_image_dir, output_file, cleaned_file_path, company_name, cleaned_content)
 
 def capture_screenshot_with_playwright(html_file_path, screenshot_path):
     """
     Capture a full-page screenshot of the HTML file directly using Playwright.
     """
     try:
-        # Launch Playwright in headless mode
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-
-            # Open the HTML file in the browser
-            page.goto(f"file:///{os.path.abspath(html_file_path)}")
-            
-            # Capture the full-page screenshot
-            page.screenshot(path=screenshot_path, full_page=True)
-            print(f"Screenshot saved: {screenshot_path}")
-
-            browser.close()
-
+        browser.capture_screenshot(html_file_path, screenshot_path)
+        print(f"Screenshot saved: {screenshot_path}")
     except Exception as e:
         print(f"Error capturing screenshot: {e}")
 
-def convert_png_to_pdf(png_path, company_name):
+def convert_png_to_pdf(png_path, company_name, output_folder="data/reports/template_PDF"):
     """
     Convert a PNG image into a PDF strictly named as 'company_name brand marketing.pdf'
-    in the specified folder 'data/reports/template_PDF'.
+    in the specified folder ('data/reports/template_PDF' by default).
     """
     try:
-        # Set the output folder and ensure it exists
-        output_folder = "data/reports/template_PDF"
+        # Ensure the output folder exists
         os.makedirs(output_folder, exist_ok=True)
 
         # Fixed PDF file name: 'brand marketing.pdf'
@@ -397,20 +398,36 @@ def convert_png_to_pdf(png_path, company_name):
     except Exception as e:
         print(f"Error converting PNG to PDF: {e}")
 
-if __name__ == "__main__":
+def render_pdf(company_name, workspace=None):
+    """Screenshot the Brand Marketing HTML page and convert it to the template PDF."""
+    workspace = job_workspace.get(workspace)
+
     # Paths for demonstration
-    html_file_path = "src/templates/brand_marketing.html"
+    html_file_path = workspace.path("src/templates/brand_marketing.html")
     
     # Screenshot saved in the folder: data/reports/template_ss
-    screenshot_folder = "data/reports/template_ss"
-    os.makedirs(screenshot_folder, exist_ok=True)
+    screenshot_folder = workspace.makedirs("data/reports/template_ss")
     screenshot_path = os.path.join(screenshot_folder, "brand_marketing_screenshot.png")
 
-    # Ensure Playwright browsers are installed
-    os.system("playwright install")
-
     # Capture screenshot
     capture_screenshot_with_playwright(html_file_path, screenshot_path)
 
     # Convert screenshot to PDF with the company name strictly as the filename
-    convert_png_to_pdf(screenshot_path, company_name)
\ No newline at end of file
+    convert_png_to_pdf(screenshot_path, company_name, workspace.path("data/reports/template_PDF"))
+
+
+def main(company_name, data=None, cleaned_content=None, workspace=None):
+    """Generate the Brand Marketing HTML page and render it to PDF."""
+    generate_html(company_name, data, cleaned_content, workspace)
+    render_pdf(company_name, workspace)
+
+if __name__ == "__main__":
+    # Force UTF-8 encoding for terminal output
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    if len(sys.argv) > 1:
+        company_name = sys.argv[1]  # The second argument passed will be the company_name
+    else:
+        company_name = "Default_Company"  # Default value if no argument is passed
+
+    main(company_name)
@@ -0,0 +1,129 @@
+import os
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+__all__ = ["ensure_browsers_installed", "capture_screenshot", "start_warm_browser", "stop_warm_browser"]
+
+_install_lock = threading.Lock()
+_installed = False
+
+# Chromium kept running by start_warm_browser (long-lived worker), else None
+_warm_browser = None
+_warm_lock = threading.Lock()
+
+def ensure_browsers_installed():
+    """Run `playwright install chromium` once per process, on first use."""
+    global _installed
+    with _install_lock:
+        if not _installed:
+            subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=False)
+            _installed = True
+
+def _screenshot_page(browser, html_file_path, screenshot_path):
+    page = browser.new_page()
+    try:
+        # Open the HTML file in the browser
+        page.goto(f"file:///{os.path.abspath(html_file_path)}")
+
+        # Capture the full-page screenshot
+        page.screenshot(path=screenshot_path, full_page=True)
+    finally:
+        page.close()
+
+class WarmBrowser:
+    """
+    A Chromium instance kept running on its own thread.
+
+    Playwright's sync API only works on the thread that started it, so every
+    screenshot is handed to that thread; each one gets a fresh page.
+    """
+
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="warm-browser", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        try:
+            from playwright.sync_api import sync_playwright
+
+            ensure_browsers_installed()
+            playwright = sync_playwright().start()
+            browser = playwright.chromium.launch(headless=True)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        try:
+            while True:
+                request = self._requests.get()
+                if request is None:
+                    break
+                html_file_path, screenshot_path, future = request
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    _screenshot_page(browser, html_file_path, screenshot_path)
+                    future.set_result(screenshot_path)
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            browser.close()
+            playwright.stop()
+
+    def screenshot(self, html_file_path, screenshot_path):
+        future = Future()
+        self._requests.put((html_file_path, screenshot_path, future))
+        return future.result()
+
+    def close(self):
+        self._requests.put(None)
+        self._thread.join()
+
+def start_warm_browser():
+    """Launch the shared Chromium instance used by capture_screenshot from now on."""
+    global _warm_browser
+    with _warm_lock:
+        if _warm_browser is None:
+            _warm_browser = WarmBrowser()
+        return _warm_browser
+
+def stop_warm_browser():
+    global _warm_browser
+    with _warm_lock:
+        if _warm_browser is not None:
+            _warm_browser.close()
+            _warm_browser = None
+
+def capture_screenshot(html_file_path, screenshot_path):
+    """
+    Capture a full-page screenshot of an HTML file with headless Chromium.
+
+    Uses the warm browser when one was started; otherwise Playwright is
+    imported (and its browsers installed) on first use and Chromium is
+    launched for this screenshot only.
+    """
+    warm_browser = _warm_browser
+    if warm_browser is not None:
+        warm_browser.screenshot(html_file_path, screenshot_path)
+        return
+
+    from playwright.sync_api import sync_playwright
+
+    ensure_browsers_installed()
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            _screenshot_page(browser, html_file_path, screenshot_path)
+        finally:
+            browser.close()
@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned feedback items
+DONTS = [
+    "Don't overcrowd the layout", "Don't hide the logo", "Don't mix font styles",
+    "Don't skip calls to action", "Don't reuse stock imagery", "Don't ignore brand colors",
+    "Don't repeat the same theme", "Don't shrink key text"
+]
+
+SUGGESTIONS = [
+    "Simplify layouts with whitespace", "Place logo consistently", "Use one font family",
+    "Add clear calls to action", "Shoot original product photos", "Apply the brand palette",
+    "Rotate creative themes weekly", "Increase headline font size"
+]
+
+# Canned strings for schema properties of these names (lists of feedback items)
+CANNED_STRINGS = {"donts": DONTS, "suggestions": SUGGESTIONS}
+
+def schema_value(schema, rng, name=""):
+    """A value matching a JSON schema: scores for numbers, a short remark for strings."""
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {key: schema_value(value, rng, key) for key, value in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        return [schema_value(schema.get("items", {}), rng, name) for _ in range(rng.randint(1, 3))]
+    if schema_type == "integer":
+        return rng.randint(schema.get("minimum", 3), schema.get("maximum", 9))
+    if schema_type == "number":
+        return round(rng.uniform(schema.get("minimum", 3), schema.get("maximum", 9)), 1)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if name in CANNED_STRINGS:
+        return rng.choice(CANNED_STRINGS[name])
+    return f"{name.capitalize()} could be stronger."
+
+def structured_reply(response_format, rng):
+    """JSON reply for a response_format of type json_schema."""
+    schema = response_format.get("json_schema", {}).get("schema", {})
+    return json.dumps(schema_value(schema, rng))
+
+def suggestions_reply(user_message, rng):
+    """
+    One suggestion per line, as many as the Don'ts in the request.
+
+    The only free-text request left: feedback asks for suggestions without a
+    schema when SUGGESTIONS_MODEL has no structured outputs.
+    """
+    count = max(1, min(len(SUGGESTIONS), user_message.count("Don't")))
+    return "\n".join(rng.sample(SUGGESTIONS, count))
+
+def build_reply(payload):
+    """Pick the canned reply matching the prompt of a chat completions payload."""
+    messages = payload.get("messages", [])
+    user_message = next((m["content"] for m in messages if m.get("role") == "user"), "")
+    # Same request, same reply, so caches and benchmarks see stable data
+    rng = random.Random(hashlib.sha256(user_message.encode("utf-8")).digest())
+
+    response_format = payload.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return structured_reply(response_format, rng)
+    return suggestions_reply(user_message, rng)
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """Serves POST /v1/chat/completions with canned replies, latency and injected failures."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        config = self.server.config
+        time.sleep(max(0.0, config["latency"] + random.uniform(-config["jitter"], config["jitter"])))
+
+        roll = random.random()
+        if roll < config["rate_limit_rate"]:
+            self.send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                           {"Retry-After": str(config["retry_after"])})
+            return
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            self.send_json(500, {"error": {"message": "Injected server error"}})
+            return
+
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            self.send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        content = build_reply(payload)
+        self.send_json(200, {
+            "id": f"chatcmpl-fake-{hashlib.sha1(body).hexdigest()[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": len(body) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(body) + len(content)) // 4
+            }
+        }, {"x-ratelimit-remaining-requests": "10000", "x-ratelimit-remaining-tokens": "10000000"})
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.config["verbose"]:
+            super().log_message(format, *args)
+
+def make_server(host="127.0.0.1", port=8765, latency=0.5, jitter=0.1, error_rate=0.0,
+                rate_limit_rate=0.0, retry_after=1, verbose=False):
+    """
+    Create the stand-in server (port 0 picks a free port).
+
+    Point the pipeline at it with OPENAI_API_URL=http://<host>:<port>/v1/chat/completions.
+    """
+    server = ThreadingHTTPServer((host, port), ChatCompletionsHandler)
+    server.daemon_threads = True
+    server.config = {
+        "latency": latency,
+        "jitter": jitter,
+        "error_rate": error_rate,
+        "rate_limit_rate": rate_limit_rate,
+        "retry_after": retry_after,
+        "verbose": verbose,
+    }
+    return server
+
+def start_in_background(**kwargs):
+    """Start a stand-in server on a daemon thread and return (server, api_url)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1/chat/completions"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the /v1/chat/completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Latency varies uniformly by +/- this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After sent with injected 429s")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                         args.rate_limit_rate, args.retry_after, args.verbose)
+    print(f"Serving fake chat completions on http://{args.host}:{args.port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,34 @@
 import pandas as pd
 import numpy as np
+import os
+
+import job_workspace
+import table_store
+
+__all__ = [
+    "category_criteria",
+    "calculate_sd_comparison_matrices",
+    "calculate_sd_comparison_matrix",
+    "find_top_non_repetitive_sd",
+    "find_top_sd_pairs_streaming",
+    "IncrementalSDMatrix",
+    "main",
+]
+
+# Define file paths, relative to the job workspace (Excel copies are only written with EXPORT_EXCEL=1)
+top_3_sd_results_path = "Output File/excel/top_3_sd_results.xlsx"
+output_folder = "data/output_generated_file/Output File/excel"
 
-# Load Excel files
-product_data = pd.read_excel("Output File/excel/product_analysis.xlsx")
-competitor_data = pd.read_excel("Output File/excel/competitor_analysis.xlsx")
+# Above this size the dense (N x M x criteria) float64 tensor is not built and
+# competitor posts are streamed in blocks instead
+DENSE_LIMIT_BYTES = int(os.environ.get("SD_DENSE_LIMIT_BYTES", str(256 * 1024 * 1024)))
+# Memory budget of one streamed block of float32 differences
+STREAMING_BLOCK_BYTES = int(os.environ.get("SD_STREAMING_BLOCK_BYTES", str(32 * 1024 * 1024)))
+# Directory receiving the full SD matrices as .npy files in streaming mode (optional,
+# relative to the job workspace like the paths above)
+SD_SPILL_DIR = os.environ.get("SD_SPILL_DIR")
+# How the top pairs of a category are chosen: "greedy" or "assignment" (dense mode only)
+SD_PAIR_METHOD = os.environ.get("SD_PAIR_METHOD", "greedy")
 
 # Function to filter criteria based on available columns
 def filter_existing_criteria(data, criteria):
@@ -33,96 +58,180 @@ social_media_marketing_criteria = [
     "Aesthetic Appeal", "Repetitiveness"
 ]
 
-# Filter criteria based on available columns in the data
-branding_criteria_filtered = filter_existing_criteria(product_data, branding_criteria)
-content_marketing_criteria_filtered = filter_existing_criteria(product_data, content_marketing_criteria)
-social_media_marketing_criteria_filtered = filter_existing_criteria(product_data, social_media_marketing_criteria)
+# Report category -> criteria; extra categories only need an entry here
+category_criteria = {
+    "Brand Marketing": branding_criteria,
+    "Content Marketing": content_marketing_criteria,
+    "Social Media Marketing": social_media_marketing_criteria,
+}
 
-# Helper function to calculate the mean value for a criterion
-def calculate_mean_criterion_value(product_data, competitor_data, criterion):
+# Helper function to extract the scores of the given criteria as a float array
+def extract_score_array(data, criteria):
     """
-    Calculate the mean of a criterion from both product and competitor data, ignoring NaN values.
+    Extract the scores of the given criteria as a float array.
 
     Args:
-        product_data: DataFrame containing product data.
-        competitor_data: DataFrame containing competitor data.
-        criterion: The column name representing the criterion.
+        data: DataFrame containing product or competitor data.
+        criteria: List of criteria (columns) to extract.
 
     Returns:
-        Mean value of the criterion.
+        Array of shape (posts, criteria); missing columns and non-numeric scores are NaN.
     """
-    combined_values = np.concatenate([
-        product_data[criterion].dropna().values,
-        competitor_data[criterion].dropna().values,
-    ])
-    return np.nanmean(combined_values)
+    scores = data.reindex(columns=criteria).apply(pd.to_numeric, errors="coerce")
+    return scores.to_numpy(dtype=np.float64)
 
-# Helper function to calculate the score differences
-def calculate_score_differences(product_scores, competitor_scores, product_data, competitor_data, category_criteria):
+# Helper function to calculate the mean value of every criterion
+def calculate_criterion_means(product_scores, competitor_scores):
     """
-    Calculate the score differences, replacing NaN with mean values.
+    Calculate the mean of every criterion over both product and competitor posts, ignoring NaN values.
 
     Args:
-        product_scores: Scores of a product post for the criteria.
-        competitor_scores: Scores of a competitor post for the criteria.
-        product_data: DataFrame containing product data.
-        competitor_data: DataFrame containing competitor data.
-        category_criteria: List of criteria in the category.
+        product_scores: Array of shape (N_product, K_criteria).
+        competitor_scores: Array of shape (N_competitor, K_criteria).
 
     Returns:
-        Array of score differences.
+        Array of K means (NaN for a criterion with no values at all).
     """
-    score_diff = product_scores - competitor_scores
-    for k, diff in enumerate(score_diff):
-        if np.isnan(diff):
-            mean_value = calculate_mean_criterion_value(product_data, competitor_data, category_criteria[k])
-            score_diff[k] = mean_value
-    return score_diff
+    combined_scores = np.concatenate([product_scores, competitor_scores])
+    counts = np.sum(~np.isnan(combined_scores), axis=0)
+    sums = np.nansum(combined_scores, axis=0)
+    return np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
 
-# Main function to calculate the SD comparison matrix
-def calculate_sd_comparison_matrix(product_data, competitor_data, category_criteria):
+# Helper function to calculate the score differences of every post pair
+def calculate_score_difference_tensor(product_scores, competitor_scores, criterion_means):
     """
-    Calculate a 6x6 SD Comparison Matrix for a specific category, replacing NaN differences with the mean of the criteria.
+    Calculate the score differences of every product/competitor pair, replacing NaN with the criterion means.
+
+    Args:
+        product_scores: Array of shape (N_product, K_criteria).
+        competitor_scores: Array of shape (N_competitor, K_criteria).
+        criterion_means: Array of K criterion means.
+
+    Returns:
+        Array of shape (N_product, N_competitor, K_criteria).
     """
-    # If there are no criteria, return a DataFrame of zeros
-    if not category_criteria:
-        return pd.DataFrame(
-            np.zeros((6, 6)),
-            index=[f"Product_{i+1}" for i in range(6)],
-            columns=[f"Competitor_{j+1}" for j in range(6)]
-        )
-    
-    sd_matrix = np.zeros((6, 6))  # Initialize a 6x6 matrix for SD values
+    score_diff = product_scores[:, np.newaxis, :] - competitor_scores[np.newaxis, :, :]
+    return np.where(np.isnan(score_diff), criterion_means, score_diff)
 
-    for i in range(6):  # Loop over product posts
-        for j in range(6):  # Loop over competitor posts
-            product_scores = product_data.iloc[i][category_criteria].values
-            competitor_scores = competitor_data.iloc[j][category_criteria].values
+# Main function to calculate the SD comparison matrices of all categories in one pass
+def calculate_sd_comparison_matrices(product_data, competitor_data, categories):
+    """
+    Calculate the N_product x N_competitor SD Comparison Matrix of every category at once,
+    replacing NaN differences with the mean of the criteria.
 
-            # Calculate score differences
-            score_diff = calculate_score_differences(
-                product_scores, competitor_scores, product_data, competitor_data, category_criteria
-            )
+    The union of all criteria is extracted and differenced a single time; each
+    category then reduces its own columns of that difference tensor.
 
-            # Safely calculate the standard deviation
-            if len(score_diff) > 0:
-                sd_matrix[i, j] = np.std(score_diff)
-            else:
-                sd_matrix[i, j] = 0
+    Args:
+        product_data: DataFrame containing product data.
+        competitor_data: DataFrame containing competitor data.
+        categories: Dict mapping category name to its list of criteria.
+
+    Returns:
+        Dict mapping category name to its SD matrix DataFrame.
+    """
+    index = [f"Product_{i+1}" for i in range(len(product_data))]
+    columns = [f"Competitor_{j+1}" for j in range(len(competitor_data))]
+
+    # Union of the criteria of every category, in first-seen order
+    all_criteria = list(dict.fromkeys(criterion for criteria in categories.values() for criterion in criteria))
+    criterion_positions = {criterion: k for k, criterion in enumerate(all_criteria)}
+
+    if all_criteria:
+        product_scores = extract_score_array(product_data, all_criteria)
+        competitor_scores = extract_score_array(competitor_data, all_criteria)
+        criterion_means = calculate_criterion_means(product_scores, competitor_scores)
+        score_diff = calculate_score_difference_tensor(product_scores, competitor_scores, criterion_means)
+
+    sd_matrices = {}
+    for category, criteria in categories.items():
+        if criteria:
+            category_columns = [criterion_positions[criterion] for criterion in criteria]
+            sd_matrix = np.std(score_diff[:, :, category_columns], axis=2)
+        else:
+            # If there are no criteria, use a matrix of zeros
+            sd_matrix = np.zeros((len(index), len(columns)))
+        # Convert to DataFrame for better readability
+        sd_matrices[category] = pd.DataFrame(sd_matrix, index=index, columns=columns)
+
+    return sd_matrices
+
+# Function to calculate the SD comparison matrix of a single category
+def calculate_sd_comparison_matrix(product_data, competitor_data, category_criteria):
+    """
+    Calculate the N_product x N_competitor SD Comparison Matrix for a specific category,
+    replacing NaN differences with the mean of the criteria.
+    """
+    return calculate_sd_comparison_matrices(
+        product_data, competitor_data, {"category": category_criteria}
+    )["category"]
+
+
+# Helper function to order the candidate cells by descending SD
+def order_candidate_cells(flat_values, flat_indices):
+    """Sort cells by descending SD, ties in row-major (flat index) order."""
+    return flat_indices[np.lexsort((flat_indices, -flat_values))]
+
+# Helper function to keep the largest cells of a flattened matrix
+def top_cells(flat_values, flat_indices, count):
+    """Return the values and flat indices of the `count` largest cells, in O(size)."""
+    if count < flat_values.size:
+        keep = np.argpartition(-flat_values, count - 1)[:count]
+        return flat_values[keep], flat_indices[keep]
+    return flat_values, flat_indices
+
+# Helper function to walk ordered cells and keep pairs of unused posts
+def pick_non_repetitive_pairs(ordered_flat_indices, n_competitor, top_count):
+    used_rows = set()
+    used_columns = set()
+    pairs = []
+    for flat_index in ordered_flat_indices:
+        if len(pairs) == top_count:
+            break
+        i, j = divmod(int(flat_index), n_competitor)
+        if i not in used_rows and j not in used_columns:
+            pairs.append((i, j))
+            used_rows.add(i)
+            used_columns.add(j)
+    return pairs
+
+# Function to pick the largest SD pairs greedily without reusing a post
+def select_pairs_greedy(sd_values, top_count):
+    """
+    Walk the cells in descending SD order, keeping a pair when neither post is used yet.
 
-    # Convert to DataFrame for better readability
-    return pd.DataFrame(sd_matrix,
-                        index=[f"Product_{i+1}" for i in range(6)],
-                        columns=[f"Competitor_{j+1}" for j in range(6)])
+    Every kept pair blocks at most N + M other cells, so only the
+    top_count * (N + M) largest cells can ever be visited; those are selected
+    in O(NM) and sorted, ties in row-major order.
+    """
+    n_product, n_competitor = sd_values.shape
+    flat_values = sd_values.ravel()
+    values, indices = top_cells(flat_values, np.arange(flat_values.size), top_count * (n_product + n_competitor))
+    return pick_non_repetitive_pairs(order_candidate_cells(values, indices), n_competitor, top_count)
 
+# Function to pick the set of pairs with the largest total SD
+def select_pairs_assignment(sd_values, top_count):
+    """
+    Solve the maximum-total-SD matching of exactly top_count pairs with linear_sum_assignment.
 
-# Calculate SD matrices for each category
-branding_sd_matrix = calculate_sd_comparison_matrix(product_data, competitor_data, branding_criteria_filtered)
-content_marketing_sd_matrix = calculate_sd_comparison_matrix(product_data, competitor_data, content_marketing_criteria_filtered)
-social_media_marketing_sd_matrix = calculate_sd_comparison_matrix(product_data, competitor_data, social_media_marketing_criteria_filtered)
+    The matrix is padded with zero-weight dummy rows and columns (dummy-dummy
+    cells forbidden) so that a perfect matching uses exactly top_count real pairs.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    n_product, n_competitor = sd_values.shape
+    top_count = min(top_count, n_product, n_competitor)
+    size = n_product + n_competitor - top_count
+    forbidden = -1e9
+    weights = np.zeros((size, size))
+    weights[:n_product, :n_competitor] = sd_values
+    weights[n_product:, n_competitor:] = forbidden
+    rows, columns = linear_sum_assignment(weights, maximize=True)
+    pairs = [(i, j) for i, j in zip(rows, columns) if i < n_product and j < n_competitor]
+    return sorted(pairs, key=lambda pair: -sd_values[pair])
 
 # Function to find the top SD values ensuring non-repetitive product and competitor image pairs
-def find_top_non_repetitive_sd(sd_matrix, product_data, competitor_data, category, top_count=3):
+def find_top_non_repetitive_sd(sd_matrix, product_data, competitor_data, category, top_count=3, method="greedy"):
     """
     Find the top SD values ensuring non-repetitive product and competitor image pairs within the same category.
 
@@ -132,55 +241,332 @@ def find_top_non_repetitive_sd(sd_matrix, product_data, competitor_data, categor
         competitor_data: DataFrame containing competitor data (to extract image names).
         category: String representing the category name.
         top_count: Number of top results to return (default is 3).
+        method: "greedy" (largest remaining SD first) or "assignment" (maximum total SD,
+            needs scipy; falls back to greedy without it).
 
     Returns:
-        List of tuples containing category, product image name, competitor image name, and SD value.
-    """
-    used_product_images = set()
-    used_competitor_images = set()
-    top_results = []
-
-    for i in range(sd_matrix.shape[0]):
-        for j in range(sd_matrix.shape[1]):
-            if len(top_results) == top_count:
-                break
-
-            product_image = product_data.iloc[i]['Image']
-            competitor_image = competitor_data.iloc[j]['Image']
-            sd_value = sd_matrix.iloc[i, j]
-
-            if product_image not in used_product_images and competitor_image not in used_competitor_images:
-                top_results.append((category, product_image, competitor_image, sd_value))
-                used_product_images.add(product_image)
-                used_competitor_images.add(competitor_image)
-
-    return top_results
-
-# Find top non-repetitive SD results
-branding_top_3 = find_top_non_repetitive_sd(branding_sd_matrix, product_data, competitor_data, "Brand Marketing")
-content_marketing_top_3 = find_top_non_repetitive_sd(content_marketing_sd_matrix, product_data, competitor_data, "Content Marketing")
-social_media_marketing_top_3 = find_top_non_repetitive_sd(social_media_marketing_sd_matrix, product_data, competitor_data, "Social Media Marketing")
-
-# Combine results into a DataFrame
-all_top_3 = branding_top_3 + content_marketing_top_3 + social_media_marketing_top_3
-top_3_df = pd.DataFrame(
-    all_top_3,
-    columns=['Category', 'Product_Image_Name', 'Competitor_Image_Name', 'SD_Value']
-)
-
-# Save results to Excel
-top_3_df.to_excel("Output File/excel/top_3_sd_results.xlsx", index=False)
-
-# Print the results
-print("\nTop 3 SD Results DataFrame:")
-print(top_3_df)
-import os
+        List of tuples containing category, product image name, competitor image name, and SD value,
+        largest SD first.
+    """
+    sd_values = sd_matrix.to_numpy(dtype=np.float64)
+    # NaN SDs (criteria without any score) never win a slot
+    sd_values = np.where(np.isnan(sd_values), -np.inf, sd_values)
+
+    if method == "assignment":
+        try:
+            pairs = select_pairs_assignment(np.where(np.isinf(sd_values), 0.0, sd_values), top_count)
+        except ImportError:
+            print("scipy is not installed; using greedy pair selection.")
+            pairs = select_pairs_greedy(sd_values, top_count)
+    else:
+        pairs = select_pairs_greedy(sd_values, top_count)
+
+    product_images = product_data['Image'].to_numpy()
+    competitor_images = competitor_data['Image'].to_numpy()
+    return [
+        (category, product_images[i], competitor_images[j], sd_matrix.iat[i, j])
+        for i, j in pairs
+    ]
+
+# Function to find the top SD pairs of every category without the dense tensor
+def find_top_sd_pairs_streaming(product_data, competitor_data, categories, top_count=3,
+                                block_bytes=STREAMING_BLOCK_BYTES, spill_dir=None):
+    """
+    Memory-bounded version of calculate_sd_comparison_matrices + greedy selection for very large feeds.
+
+    Competitor posts are processed in float32 blocks sized to block_bytes; for
+    every category only a running set of the top_count * (N + M) largest cells
+    is kept, which is all the greedy selection can ever visit. With spill_dir,
+    the full SD matrices are written block by block to memory-mapped .npy files.
+
+    Args:
+        product_data: DataFrame containing product data.
+        competitor_data: DataFrame containing competitor data.
+        categories: Dict mapping category name to its list of criteria.
+        top_count: Number of pairs per category.
+        block_bytes: Memory budget of one block of differences.
+        spill_dir: Optional directory for "<category>.npy" SD matrices.
+
+    Returns:
+        List of (category, product image name, competitor image name, SD value) tuples.
+    """
+    n_product, n_competitor = len(product_data), len(competitor_data)
+    all_criteria = list(dict.fromkeys(criterion for criteria in categories.values() for criterion in criteria))
+    criterion_positions = {criterion: k for k, criterion in enumerate(all_criteria)}
+
+    product_scores = extract_score_array(product_data, all_criteria)
+    competitor_scores = extract_score_array(competitor_data, all_criteria)
+    criterion_means = calculate_criterion_means(product_scores, competitor_scores).astype(np.float32)
+    product_scores = product_scores.astype(np.float32)
+    competitor_scores = competitor_scores.astype(np.float32)
+
+    row_bytes = max(1, n_product * len(all_criteria) * np.dtype(np.float32).itemsize)
+    block_size = max(1, min(n_competitor, block_bytes // row_bytes))
+    candidate_count = top_count * (n_product + n_competitor)
+
+    candidates = {}
+    spilled = {}
+    for category, criteria in categories.items():
+        candidates[category] = (np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64))
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            spilled[category] = np.lib.format.open_memmap(
+                os.path.join(spill_dir, f"{category.replace(' ', '_')}.npy"),
+                mode="w+", dtype=np.float32, shape=(n_product, n_competitor)
+            )
+
+    for start in range(0, n_competitor, block_size):
+        end = min(start + block_size, n_competitor)
+        if all_criteria:
+            score_diff = calculate_score_difference_tensor(product_scores, competitor_scores[start:end], criterion_means)
+        block_indices = (np.arange(n_product)[:, np.newaxis] * n_competitor + np.arange(start, end)).ravel()
+
+        for category, criteria in categories.items():
+            if criteria:
+                category_columns = [criterion_positions[criterion] for criterion in criteria]
+                sd_block = np.std(score_diff[:, :, category_columns], axis=2)
+            else:
+                sd_block = np.zeros((n_product, end - start), dtype=np.float32)
+            if category in spilled:
+                spilled[category][:, start:end] = sd_block
+
+            # NaN SDs (criteria without any score) never win a slot
+            block_values = np.where(np.isnan(sd_block), -np.inf, sd_block).ravel()
+            values, indices = candidates[category]
+            candidates[category] = top_cells(
+                np.concatenate([values, block_values]), np.concatenate([indices, block_indices]), candidate_count
+            )
+
+    product_images = product_data['Image'].to_numpy()
+    competitor_images = competitor_data['Image'].to_numpy()
+    results = []
+    for category, (values, indices) in candidates.items():
+        order = order_candidate_cells(values, indices)
+        value_by_index = dict(zip(indices.tolist(), values.tolist()))
+        for i, j in pick_non_repetitive_pairs(order, n_competitor, top_count):
+            sd_value = value_by_index[i * n_competitor + j]
+            results.append((category, product_images[i], competitor_images[j], sd_value if np.isfinite(sd_value) else np.nan))
+    for matrix in spilled.values():
+        matrix.flush()
+    return results
+
+class IncrementalSDMatrix:
+    """
+    SD matrices that follow single-post changes without recomputing everything.
+
+    Keeps the score arrays and the SD matrix of every category. Adding,
+    removing or replacing a post recomputes only its row (product) or column
+    (competitor); the criterion means used for missing scores are refreshed in
+    O((N + M) * criteria) and only rows/columns with missing scores in a
+    criterion whose mean moved are recomputed as well.
+    """
+
+    def __init__(self, product_data, competitor_data, categories=None):
+        categories = categories or {
+            category: filter_existing_criteria(product_data, criteria)
+            for category, criteria in category_criteria.items()
+        }
+        self.categories = categories
+        self.criteria = list(dict.fromkeys(criterion for criteria in categories.values() for criterion in criteria))
+        positions = {criterion: k for k, criterion in enumerate(self.criteria)}
+        self.category_columns = {
+            category: [positions[criterion] for criterion in criteria]
+            for category, criteria in categories.items()
+        }
+
+        self.product_images = list(product_data['Image'])
+        self.competitor_images = list(competitor_data['Image'])
+        self.product_scores = np.array(extract_score_array(product_data, self.criteria), dtype=float)
+        self.competitor_scores = np.array(extract_score_array(competitor_data, self.criteria), dtype=float)
+        self.criterion_means = calculate_criterion_means(self.product_scores, self.competitor_scores)
+        self.sd = self._compute(self.product_scores, self.competitor_scores)
+
+    def _compute(self, product_scores, competitor_scores):
+        """SD block of every category for the given product rows and competitor columns."""
+        shape = (len(product_scores), len(competitor_scores))
+        if not self.criteria or 0 in shape:
+            return {category: np.zeros(shape) for category in self.categories}
+        score_diff = calculate_score_difference_tensor(product_scores, competitor_scores, self.criterion_means)
+        return {
+            category: np.std(score_diff[:, :, columns], axis=2) if columns else np.zeros(shape)
+            for category, columns in self.category_columns.items()
+        }
+
+    def _score_row(self, scores):
+        """Criterion scores (dict, Series or one-row DataFrame) as a float array."""
+        frame = scores if isinstance(scores, pd.DataFrame) else pd.DataFrame([dict(scores)])
+        return extract_score_array(frame, self.criteria)[0]
+
+    def _recompute_rows(self, rows):
+        if len(rows):
+            block = self._compute(self.product_scores[rows], self.competitor_scores)
+            for category in self.categories:
+                self.sd[category][rows, :] = block[category]
+
+    def _recompute_columns(self, columns):
+        if len(columns):
+            block = self._compute(self.product_scores, self.competitor_scores[columns])
+            for category in self.categories:
+                self.sd[category][:, columns] = block[category]
+
+    def _refresh_means(self, skip_row=None, skip_column=None):
+        """Update the criterion means and fix the cells that used a mean that moved."""
+        new_means = calculate_criterion_means(self.product_scores, self.competitor_scores)
+        changed = ~np.isclose(new_means, self.criterion_means, equal_nan=True)
+        self.criterion_means = new_means
+        if not changed.any():
+            return
+        rows = np.flatnonzero(np.isnan(self.product_scores[:, changed]).any(axis=1))
+        columns = np.flatnonzero(np.isnan(self.competitor_scores[:, changed]).any(axis=1))
+        self._recompute_rows(rows[rows != skip_row])
+        self._recompute_columns(columns[columns != skip_column])
+
+    def set_product(self, image, scores):
+        """Add a product post, or replace the post with the same image name."""
+        row = self._score_row(scores)
+        if image in self.product_images:
+            i = self.product_images.index(image)
+            self.product_scores[i] = row
+        else:
+            i = len(self.product_images)
+            self.product_images.append(image)
+            self.product_scores = np.vstack([self.product_scores, row])
+            for category in self.categories:
+                self.sd[category] = np.vstack([self.sd[category], np.zeros((1, len(self.competitor_images)))])
+        # Row i is recomputed below with the new means either way
+        self._refresh_means(skip_row=i)
+        self._recompute_rows([i])
+
+    def set_competitor(self, image, scores):
+        """Add a competitor post, or replace the post with the same image name."""
+        column = self._score_row(scores)
+        if image in self.competitor_images:
+            j = self.competitor_images.index(image)
+            self.competitor_scores[j] = column
+        else:
+            j = len(self.competitor_images)
+            self.competitor_images.append(image)
+            self.competitor_scores = np.vstack([self.competitor_scores, column])
+            for category in self.categories:
+                self.sd[category] = np.hstack([self.sd[category], np.zeros((len(self.product_images), 1))])
+        # Column j is recomputed below with the new means either way
+        self._refresh_means(skip_column=j)
+        self._recompute_columns([j])
+
+    def remove_product(self, image):
+        """Remove a product post."""
+        i = self.product_images.index(image)
+        del self.product_images[i]
+        self.product_scores = np.delete(self.product_scores, i, axis=0)
+        for category in self.categories:
+            self.sd[category] = np.delete(self.sd[category], i, axis=0)
+        self._refresh_means()
+
+    def remove_competitor(self, image):
+        """Remove a competitor post."""
+        j = self.competitor_images.index(image)
+        del self.competitor_images[j]
+        self.competitor_scores = np.delete(self.competitor_scores, j, axis=0)
+        for category in self.categories:
+            self.sd[category] = np.delete(self.sd[category], j, axis=1)
+        self._refresh_means()
+
+    def sd_matrix(self, category):
+        """SD matrix of a category as a DataFrame, labelled like calculate_sd_comparison_matrix."""
+        return pd.DataFrame(
+            self.sd[category],
+            index=[f"Product_{i+1}" for i in range(len(self.product_images))],
+            columns=[f"Competitor_{j+1}" for j in range(len(self.competitor_images))]
+        )
+
+    def top_pairs(self, top_count=3):
+        """Top non-repetitive SD pairs of every category, as in top_3_sd_results."""
+        results = []
+        for category, sd_values in self.sd.items():
+            sd_values = np.where(np.isnan(sd_values), -np.inf, sd_values)
+            for i, j in select_pairs_greedy(sd_values, top_count):
+                results.append((category, self.product_images[i], self.competitor_images[j], self.sd[category][i, j]))
+        return results
+
+    def top_pairs_dataframe(self, top_count=3):
+        return pd.DataFrame(
+            self.top_pairs(top_count),
+            columns=['Category', 'Product_Image_Name', 'Competitor_Image_Name', 'SD_Value']
+        )
+
+# Helper function to decide whether the dense tensor fits the memory budget
+def needs_streaming(product_data, competitor_data, categories):
+    criteria_count = len({criterion for criteria in categories.values() for criterion in criteria})
+    dense_bytes = len(product_data) * len(competitor_data) * criteria_count * np.dtype(np.float64).itemsize
+    return dense_bytes > DENSE_LIMIT_BYTES
+
+def main(product_data=None, competitor_data=None, streaming=None, workspace=None):
+    """
+    Compute the top non-repetitive SD pairs for every category and save them to the table store.
+
+    Args:
+        product_data: Product score DataFrame; read from the table store when not given.
+        competitor_data: Competitor score DataFrame; read from the table store when not given.
+        streaming: Force (True) or disable (False) the memory-bounded streaming mode;
+            by default it is used when the dense tensor would exceed DENSE_LIMIT_BYTES.
+        workspace: Job workspace of the run; the shared tree when not given.
+
+    Returns:
+        DataFrame with the top SD results of every category.
+    """
+    workspace = job_workspace.get(workspace)
+
+    # Load the stored score tables
+    if product_data is None:
+        product_data = table_store.read_table("product_analysis", workspace)
+    if competitor_data is None:
+        competitor_data = table_store.read_table("competitor_analysis", workspace)
+
+    # Filter criteria based on available columns in the data
+    categories = {
+        category: filter_existing_criteria(product_data, criteria)
+        for category, criteria in category_criteria.items()
+    }
+
+    if streaming is None:
+        streaming = needs_streaming(product_data, competitor_data, categories)
+
+    if streaming:
+        # Stream competitor posts in blocks, keeping only the best candidates
+        if SD_PAIR_METHOD != "greedy":
+            print(f"SD_PAIR_METHOD={SD_PAIR_METHOD} is not available in streaming mode; using greedy pair selection.")
+        spill_dir = workspace.path(SD_SPILL_DIR) if SD_SPILL_DIR else None
+        all_top_3 = find_top_sd_pairs_streaming(product_data, competitor_data, categories, spill_dir=spill_dir)
+    else:
+        # Calculate SD matrices for every category in one pass
+        sd_matrices = calculate_sd_comparison_matrices(product_data, competitor_data, categories)
+
+        # Find top non-repetitive SD results
+        all_top_3 = []
+        for category, sd_matrix in sd_matrices.items():
+            all_top_3 += find_top_non_repetitive_sd(
+                sd_matrix, product_data, competitor_data, category, method=SD_PAIR_METHOD
+            )
+
+    # Combine results into a DataFrame
+    top_3_df = pd.DataFrame(
+        all_top_3,
+        columns=['Category', 'Product_Image_Name', 'Competitor_Image_Name', 'SD_Value']
+    )
+
+    # Save results for the next stages
+    table_path = table_store.write_table(top_3_df, "top_3_sd_results", workspace)
+
+    # Print the results
+    print("\nTop 3 SD Results DataFrame:")
+    print(top_3_df)
+    print(f"Top 3 SD Results saved in: {table_path}")
+
+    # Optional Excel deliverables
+    table_store.export_excel(top_3_df, workspace.path(top_3_sd_results_path))
+    table_store.export_excel(top_3_df, workspace.path(os.path.join(output_folder, "top_3_sd_results.xlsx")))
+    return top_3_df
 
-output_folder = "data/output_generated_file/Output File/excel"
-output_file_path = os.path.join(output_folder, "top_3_sd_results.xlsx")
-os.makedirs(output_folder, exist_ok=True)
-# Save results to the specified folder
-top_3_df.to_excel(output_file_path, index=False)
 
-# Print confirmation
-print(f"Top 3 SD Results saved in: {output_file_path}")
+if __name__ == "__main__":
+    main()
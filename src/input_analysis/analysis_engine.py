@@ -0,0 +1,33 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Maximum number of model requests in flight across every analysis in this process
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("ANALYSIS_MAX_CONCURRENCY", "12"))
+
+# Shared by the product and competitor analyses, which run side by side in the pipeline
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+def run_limited(func, *args, **kwargs):
+    """Call func (usually a model request) while holding one of the shared request slots."""
+    with _request_slots:
+        return func(*args, **kwargs)
+
+def analyze_concurrently(analyze_one, items):
+    """
+    Run analyze_one over the items, at most MAX_CONCURRENT_REQUESTS at a time.
+
+    Args:
+        analyze_one: Function analysing a single item; it should send its model
+            request through run_limited.
+        items: Items to analyse (e.g. image paths).
+
+    Returns:
+        List of results in the same order as items.
+    """
+    items = list(items)
+    if not items:
+        return []
+    # More threads than request slots would only wait on the semaphore
+    with ThreadPoolExecutor(max_workers=max(1, min(len(items), MAX_CONCURRENT_REQUESTS))) as executor:
+        return list(executor.map(analyze_one, items))
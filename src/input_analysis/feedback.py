@@ -1,19 +1,46 @@
-import openai
 import os
-import requests
 import logging
 import json
 import re
 
-import os
-api_key = os.environ.get("OPENAI_API_KEY")
+import analysis_engine
+import http_client
+import job_workspace
+
+__all__ = [
+    "collect_feedback",
+    "get_donts",
+    "get_suggestions_from_gpt",
+    "get_feedback_single_request",
+    "format_cleaned_output",
+    "is_complete",
+    "main",
+]
 
-# Define the paths to the input files and output file
+# Define the paths to the input files and output file (relative to the job workspace)
 input_dir = r"data/output_generated_file"
 branding_file = os.path.join(input_dir, 'Product_branding.txt')
 content_marketing_file = os.path.join(input_dir, 'Product_content_marketing.txt')
 smm_file = os.path.join(input_dir, 'Product_smm.txt')
 
+# Report category -> category file of the product responses
+category_files = {
+    "Brand Marketing": branding_file,
+    "Content Marketing": content_marketing_file,
+    "Social Media Marketing": smm_file,
+}
+
+# "concurrent": one Don'ts and one suggestions request per category, categories in parallel;
+# "single": one request returning the Don'ts and suggestions of every category
+FEEDBACK_MODE = os.environ.get("FEEDBACK_MODE", "concurrent")
+# Model of the suggestions requests and of the single-request mode
+SUGGESTIONS_MODEL = os.environ.get("SUGGESTIONS_MODEL", "gpt-4o")
+# Placeholder of a category whose Don'ts could not be generated
+NO_DONTS = "No relevant 'Don'ts' found."
+# Model families that accept json_schema response formats; other models (e.g. gpt-4)
+# reject them with a 400
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
 # Function to read file content
 def read_file(file_path):
     try:
@@ -24,17 +51,8 @@ def read_file(file_path):
         with open(file_path, 'r', encoding='ISO-8859-1') as file:
             return file.read()
 
-# Read the content from the three files
-branding_content = read_file(branding_file)
-content_marketing_content = read_file(content_marketing_file)
-smm_content = read_file(smm_file)
-
-# LLM request function based on your provided syntax
-def request_analysis(system_message, user_message, model="gpt-4o-mini", max_tokens=1500):
-    headers = {
-        'Authorization': f'Bearer {openai.api_key}',
-        'Content-Type': 'application/json'
-    }
+# LLM request function based on your provided syntax; returns None on failure
+def request_analysis(system_message, user_message, model="gpt-4o-mini", max_tokens=1500, response_format=None):
     payload = {
         "model": model,
         "messages": [
@@ -43,81 +61,118 @@ def request_analysis(system_message, user_message, model="gpt-4o-mini", max_toke
         ],
         "max_tokens": max_tokens
     }
-    response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
+    if response_format:
+        payload["response_format"] = response_format
+    response = http_client.post_chat_completion(payload)
 
     if response.status_code == 200:
         try:
-            return response.json().get("choices", [{}])[0].get("message", {}).get("content", "Unexpected response format")
+            return response.json().get("choices", [{}])[0].get("message", {}).get("content")
         except Exception as e:
             logging.error(f"Error parsing response: {e}")
             logging.debug(f"Raw Response: {response.text}")
-            return "Error parsing the response."
+            return None
     else:
         logging.error(f"Request failed with status code {response.status_code}")
-        return f"Error: {response.status_code}"
+        return None
 
-# Function to extract "Don'ts" using regex
-def extract_donts(text):
-    pattern = re.findall(r"(?:-\s*Don't\s+|-\s*)([^\n]+)", text)
-    return [f"Don't {dont.strip()}" for dont in pattern if not dont.startswith("Don't")]
+# Function to check whether a model accepts json_schema structured outputs
+def supports_structured_outputs(model):
+    return model.startswith(STRUCTURED_OUTPUT_MODELS)
 
-# Retry logic for getting "Don'ts" from GPT
-def get_donts_with_retry(content, category, retries=10):
-    system_message = (
-        "You are an expert in branding, content marketing, and social media marketing. "
-        "Based on the provided content, generate a list of 3-6 word 'Don'ts' for the company. "
-        "Ensure each point MUST start with 'Don't' and write them as concise, actionable bullet points."
-    )
+# Schema of a response holding one list of strings under key
+def list_response_format(key):
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": key,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {key: {"type": "array", "items": {"type": "string"}}},
+                "required": [key],
+                "additionalProperties": False,
+            },
+        },
+    }
 
-    user_message = f"Category: {category}\nContent:\n{content}\n\nPlease provide the 'Don'ts' in bullet points."
-    
-    for attempt in range(retries):
-        response = request_analysis(system_message, user_message)
-        donts = extract_donts(response)
-        
-        # If we get valid "Don'ts", return them
-        if donts:
-            return [clean_text(dont) for dont in donts]
-        
-        logging.info(f"Attempt {attempt + 1} for category {category} yielded no data. Retrying...")
-    
-    # If all attempts fail, return an empty or default list
-    logging.warning(f"All retry attempts for {category} failed. No 'Don'ts' found.")
-    return ["No relevant 'Don'ts' found after retries."]
-
-# Function to clean text by removing unwanted characters (quotes, commas, periods)
-def clean_text(text):
-    cleaned_text = re.sub(r'[\"\'.,]+', '', text).strip()
-    return cleaned_text
+# Function to load the JSON object of a response, tolerating text or code fences around it
+def load_json_object(text):
+    if not isinstance(text, str):
+        return None
+    candidates = [text]
+    start, end = text.find("{"), text.rfind("}")
+    if 0 <= start < end:
+        candidates.append(text[start:end + 1])
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
 
-# Get "Don'ts" with retry logic for each category
-branding_donts_cleaned = get_donts_with_retry(branding_content, "Brand Marketing")
-content_marketing_donts_cleaned = get_donts_with_retry(content_marketing_content, "Content Marketing")
-smm_donts_cleaned = get_donts_with_retry(smm_content, "Social Media Marketing")
+# Function to split a free-text list into its items (bullets, numbering and headings removed)
+def split_list_items(text):
+    items = []
+    for line in text.splitlines():
+        item = re.sub(r"^\s*(?:[-*\u2022]|\d+[.)])\s*", "", line).strip().rstrip(",").strip('"').strip()
+        if item and not item.endswith(":"):
+            items.append(item)
+    return items
 
-# Store results in a dictionary
-donts_output = {
-    "Brand Marketing": branding_donts_cleaned,
-    "Content Marketing": content_marketing_donts_cleaned,
-    "Social Media Marketing": smm_donts_cleaned
-}
+# Function to validate a list of strings from a structured response
+def validate_items(items):
+    """Return the non-empty string items without duplicates, or None if items is not a list."""
+    if not isinstance(items, list):
+        return None
+    return list(dict.fromkeys(item.strip() for item in items if isinstance(item, str) and item.strip()))
 
-# Print cleaned results
-print(json.dumps(donts_output, indent=4))
+def parse_list_response(response, key):
+    """
+    Read the list under key from a structured response.
 
-# Save cleaned output to a file
-output_file = os.path.join(input_dir, 'Product_donts_output_cleaned.txt')
-with open(output_file, 'w') as file:
-    for category, dont_list in donts_output.items():
-        file.write(f"{category}:\n")
-        for dont in dont_list:
-            file.write(f"- {dont}\n")
-        file.write("\n")
+    A response that is not valid JSON for the schema is repaired locally:
+    the JSON object is looked for inside the text, and otherwise the text is
+    read as a plain bullet list, so a near miss never costs another request.
 
-print(f"Cleaned output saved to {output_file}")
+    Returns:
+        List of items (empty if the request failed or nothing usable came back).
+    """
+    data = load_json_object(response)
+    if data is not None:
+        items = validate_items(data.get(key))
+        if items is not None:
+            return items
+    if not isinstance(response, str):
+        return []
+    logging.info(f"Repairing a '{key}' response that does not match its schema.")
+    return validate_items(split_list_items(response))
 
+# Function to write a Don't in the "Dont ..." form of the extracted bullet points
+def normalize_dont(text):
+    if not re.match(r"don['\u2019]?t\b", text, re.IGNORECASE):
+        text = f"Don't {text}"
+    return clean_text(text)
 
+# Function to get the "Don'ts" of one category in a single schema-constrained request
+def get_donts(content, category):
+    system_message = (
+        "You are an expert in branding, content marketing, and social media marketing. "
+        "Based on the provided content, generate a list of 3-6 word 'Don'ts' for the company. "
+        "Ensure each point MUST start with 'Don't' and write them as concise, actionable points."
+    )
+
+    user_message = f"Category: {category}\nContent:\n{content}\n\nPlease provide the 'Don'ts'."
 
+    response = request_analysis(system_message, user_message, response_format=list_response_format("donts"))
+    donts = list(dict.fromkeys(normalize_dont(dont) for dont in parse_list_response(response, "donts")))
+    if donts:
+        return donts
+
+    logging.warning(f"No 'Don'ts' found for {category}.")
+    return [NO_DONTS]
 
 # Function to strip unwanted characters (quotes, commas, periods, etc.)
 def clean_text(text):
@@ -129,93 +184,200 @@ def clean_text(text):
 def strip_inverted_commas(items):
     return [item.replace('"', '').replace("'", "").strip() for item in items]
 
-# Function to send requests to OpenAI API
-def request_analysis(system_message, user_message, model="gpt-4", max_tokens=1500):
-    headers = {
-        'Authorization': f'Bearer {openai.api_key}',
-        'Content-Type': 'application/json'
-    }
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_message}
-        ],
-        "max_tokens": max_tokens
-    }
-    response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
-    if response.status_code == 200:
-        try:
-            return response.json().get("choices", [{}])[0].get("message", {}).get("content", "Unexpected response format")
-        except Exception as e:
-            logging.error(f"Error parsing response: {e}")
-            return "Error parsing the response."
-    else:
-        logging.error(f"Request failed with status code {response.status_code}")
-        return f"Error: {response.status_code}"
-
 # Function to generate suggestions from GPT
 def get_suggestions_from_gpt(product_donts, category):
     system_message = """
     You are an expert marketing consultant. Based on the company's weaknesses, generate a list of suggestions for each category.
     The number of suggestions should match the number of "Don'ts" provided.
     Each suggestion should be 3-6 words, practical, and tailored to address the specific weakness.
-    Provide output as a clean list without numbers, brackets, or extra formatting.
+    Provide each suggestion without numbers, brackets, or extra formatting.
     """
     user_message = f"""
     Category: {category}
     Product Company's Weaknesses (Don'ts): {product_donts}
-    Provide only the suggestions list as output, separated by new lines.
+    Provide only the suggestions list as output.
     """
-    response = request_analysis(system_message, user_message)
-    if response != "Error parsing the response.":
-        # Clean up the response by removing unwanted symbols
-        suggestions = [clean_text(line.strip().replace("-", "").strip()) for line in response.strip().split("\n") if line.strip()]
-        return suggestions
-    return []
-
-# Generate lists of suggestions for each category
-branding_suggestions = get_suggestions_from_gpt(branding_donts_cleaned, "Brand Marketing")
-content_marketing_suggestions = get_suggestions_from_gpt(content_marketing_donts_cleaned, "Content Marketing")
-smm_suggestions = get_suggestions_from_gpt(smm_donts_cleaned, "Social Media Marketing")
-
-# Prepare output dictionary
-output = {
-    "Brand Marketing": branding_suggestions,
-    "Content Marketing": content_marketing_suggestions,
-    "Social Media Marketing": smm_suggestions
-}
+    # Models without structured outputs answer in free text, repaired by parse_list_response
+    response_format = list_response_format("suggestions") if supports_structured_outputs(SUGGESTIONS_MODEL) else None
+    response = request_analysis(
+        system_message, user_message, model=SUGGESTIONS_MODEL, response_format=response_format
+    )
+    # Clean up the suggestions by removing unwanted symbols; at most one per Don't
+    suggestions = [clean_text(suggestion.replace("-", " ")) for suggestion in parse_list_response(response, "suggestions")]
+    return [suggestion for suggestion in suggestions if suggestion][:len(product_donts)]
 
-# Print the output for verification
-for category, items in output.items():
-    print(f"{category}:")
-    for item in items:
-        print(f'- {item}')
-    print()
+# Function to get the Don'ts and then the suggestions of one category
+def get_category_feedback(category, content):
+    donts = analysis_engine.run_limited(get_donts, content, category)
+    suggestions = analysis_engine.run_limited(get_suggestions_from_gpt, donts, category)
+    return donts, suggestions
 
-# Save output to a file
-output_file = os.path.join("data", "output_generated_file", "Product_suggestions_output_cleaned.txt")
+# Schema of the single-request mode: Don'ts and suggestions of every category
+def feedback_response_format(categories):
+    item_schema = {
+        "type": "object",
+        "properties": {
+            "donts": {"type": "array", "items": {"type": "string"}},
+            "suggestions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["donts", "suggestions"],
+        "additionalProperties": False,
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "category_feedback",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {category: item_schema for category in categories},
+                "required": list(categories),
+                "additionalProperties": False,
+            },
+        },
+    }
 
+def get_feedback_single_request(contents):
+    """
+    Ask for the Don'ts and suggestions of every category in one request.
 
-print("This branding don't ")
-print(branding_donts_cleaned)
+    Args:
+        contents: {category: category content}.
 
-# Save cleaned output to a file
-output_file = os.path.join(input_dir, 'Product_output_cleaned.txt')
+    Returns:
+        ({category: Don'ts}, {category: suggestions}), or None if the response is unusable.
+    """
+    system_message = """
+    You are an expert in branding, content marketing, and social media marketing and an expert marketing consultant.
+    For every category, list 3-6 word 'Don'ts' for the company based on the provided content, each starting with 'Don't'.
+    Then give one practical, 3-6 word suggestion addressing each Don't, in the same order.
+    """
+    user_message = "\n\n".join(f"Category: {category}\nContent:\n{content}" for category, content in contents.items())
+    response = request_analysis(
+        system_message, user_message, model=SUGGESTIONS_MODEL, max_tokens=3000,
+        response_format=feedback_response_format(contents)
+    )
+
+    feedback = load_json_object(response) or {}
+    donts_output, output = {}, {}
+    for category in contents:
+        category_feedback = feedback.get(category)
+        if not isinstance(category_feedback, dict):
+            category_feedback = {}
+        donts = validate_items(category_feedback.get("donts")) or []
+        suggestions = validate_items(category_feedback.get("suggestions")) or []
+        donts_output[category] = list(dict.fromkeys(normalize_dont(dont) for dont in donts))
+        output[category] = [clean_text(suggestion) for suggestion in suggestions][:len(donts_output[category])]
+
+    if not all(donts_output.values()):
+        logging.warning("Single-request feedback has a category without Don'ts; falling back to per-category requests.")
+        return None
+    return donts_output, output
 
-with open(output_file, 'w') as file:
+def collect_feedback(contents, mode=FEEDBACK_MODE):
+    """
+    Get the Don'ts and suggestions of every category.
+
+    Args:
+        contents: {category: category content}.
+        mode: "concurrent" (categories in parallel, two requests each) or "single"
+            (one request for everything, per-category requests as fallback; needs a
+            SUGGESTIONS_MODEL with structured outputs).
+
+    Returns:
+        ({category: Don'ts}, {category: suggestions}).
+    """
+    if mode == "single":
+        if supports_structured_outputs(SUGGESTIONS_MODEL):
+            feedback = get_feedback_single_request(contents)
+            if feedback is not None:
+                return feedback
+        else:
+            logging.warning(f"{SUGGESTIONS_MODEL} does not support structured outputs; using per-category requests.")
+
+    results = analysis_engine.analyze_concurrently(lambda item: get_category_feedback(*item), contents.items())
+    donts_output = {category: donts for category, (donts, _) in zip(contents, results)}
+    output = {category: suggestions for category, (_, suggestions) in zip(contents, results)}
+    return donts_output, output
+
+# Function to render the Don'ts and Suggestions in the format parsed by the templates
+def format_cleaned_output(donts_output, output):
+    lines = []
     for category in donts_output.keys():
         # Write the category
-        file.write(f"{category}:\n")
-        file.write("Don'ts:\n")
+        lines.append(f"{category}:\n")
+        lines.append("Don'ts:\n")
         # Write the "Don'ts"
         for dont in donts_output[category]:
-            file.write(f"- {dont}\n")
-        file.write("\nSuggestions:\n")
+            lines.append(f"- {dont}\n")
+        lines.append("\nSuggestions:\n")
         # Write the corresponding suggestions
         suggestions = output[category]
         for suggestion in suggestions:
-            file.write(f"- {suggestion}\n")
-        file.write("\n" + "="*50 + "\n\n")
+            lines.append(f"- {suggestion}\n")
+        lines.append("\n" + "="*50 + "\n\n")
+    return "".join(lines)
+
+# Function to tell the stage cache whether a run may be stored
+def is_complete(cleaned_output):
+    """False if a category has no Don'ts or no suggestions (failed requests), so the next run asks again."""
+    return NO_DONTS not in cleaned_output and "\nSuggestions:\n\n" not in cleaned_output
+
+def main(sections=None, mode=None, workspace=None):
+    """
+    Generate the Don'ts and Suggestions for every category and save them.
+
+    Args:
+        sections: Optional {file path: content} dict from the category splitter;
+            the category files are read from disk when not given.
+        mode: Feedback mode, FEEDBACK_MODE by default (see collect_feedback).
+        workspace: Job workspace of the run; the shared tree when not given.
+
+    Returns:
+        The content written to Product_output_cleaned.txt.
+    """
+    sections = sections or {}
+    workspace = job_workspace.get(workspace)
+
+    # Read the content of the three category files
+    contents = {
+        category: sections.get(file_path) or read_file(workspace.path(file_path))
+        for category, file_path in category_files.items()
+    }
+
+    # Get the "Don'ts" and suggestions of every category
+    donts_output, output = collect_feedback(contents, mode or FEEDBACK_MODE)
+
+    # Print cleaned results
+    print(json.dumps(donts_output, indent=4))
+
+    # Save cleaned output to a file
+    output_file = workspace.path(os.path.join(input_dir, 'Product_donts_output_cleaned.txt'))
+    with open(output_file, 'w') as file:
+        for category, dont_list in donts_output.items():
+            file.write(f"{category}:\n")
+            for dont in dont_list:
+                file.write(f"- {dont}\n")
+            file.write("\n")
+
+    print(f"Cleaned output saved to {output_file}")
+
+    # Print the output for verification
+    for category, items in output.items():
+        print(f"{category}:")
+        for item in items:
+            print(f'- {item}')
+        print()
+
+    # Save cleaned output to a file
+    output_file = workspace.path(os.path.join(input_dir, 'Product_output_cleaned.txt'))
+    cleaned_output = format_cleaned_output(donts_output, output)
+
+    with open(output_file, 'w') as file:
+        file.write(cleaned_output)
+
+    print(f"All outputs saved to {output_file}")
+    return cleaned_output
 
-print(f"All outputs saved to {output_file}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import rate_limiter
+
+# httpx with the h2 package gives HTTP/2; plain requests (HTTP/1.1 keep-alive) otherwise
+try:
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+# Define constants
+# OPENAI_API_URL can point every call at another endpoint, e.g. src/fake_openai_server.py
+API_URL = os.environ.get("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+CONNECT_TIMEOUT = float(os.environ.get("OPENAI_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.environ.get("OPENAI_READ_TIMEOUT", "120"))
+POOL_SIZE = int(os.environ.get("OPENAI_POOL_SIZE", "32"))
+MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "5"))
+
+# Responses worth retrying: rate limited, or the server is having trouble
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+if httpx is not None:
+    RETRY_EXCEPTIONS += (httpx.TransportError,)
+
+# One client per process, shared by every stage and thread
+_client = None
+_client_lock = threading.Lock()
+
+def get_headers():
+    """Headers sent with every model request."""
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY')}"
+    }
+
+def get_client():
+    """
+    Return the shared HTTP client, creating it on first use.
+
+    Connections are kept alive and pooled, so the 12+ model calls of a report
+    (and every report served by the same process) reuse the same TCP/TLS sessions.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            if httpx is not None:
+                _client = httpx.Client(
+                    http2=True,
+                    headers=get_headers(),
+                    timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                    limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+                )
+            else:
+                session = requests.Session()
+                session.headers.update(get_headers())
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _client = session
+        return _client
+
+def _post(payload, read_timeout):
+    if httpx is not None:
+        return get_client().post(API_URL, json=payload, timeout=httpx.Timeout(read_timeout, connect=CONNECT_TIMEOUT))
+    return get_client().post(API_URL, json=payload, timeout=(CONNECT_TIMEOUT, read_timeout))
+
+def post_chat_completion(payload, timeout=None):
+    """
+    POST a chat completions payload through the shared client.
+
+    Every attempt waits for the shared rate limiter; 429s, 5xx responses and
+    connection errors are retried up to MAX_RETRIES times, honouring
+    Retry-After and otherwise backing off exponentially with jitter.
+
+    Args:
+        payload (dict): Request body.
+        timeout (float): Optional read timeout overriding READ_TIMEOUT.
+
+    Returns:
+        The HTTP response (status_code, headers, text and json() are available
+        with either backend).
+    """
+    read_timeout = timeout if timeout is not None else READ_TIMEOUT
+    limiter = rate_limiter.limiter
+    estimated_tokens = rate_limiter.estimate_tokens(payload)
+
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(estimated_tokens)
+        try:
+            response = _post(payload, read_timeout)
+        except RETRY_EXCEPTIONS:
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(limiter.backoff_delay(attempt))
+            continue
+
+        limiter.update_from_headers(response.headers)
+        if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+            return response
+
+        delay = limiter.backoff_delay(attempt, rate_limiter.parse_duration(response.headers.get("retry-after")))
+        if response.status_code == 429:
+            # Everyone sharing the key waits, instead of each thread hitting the limit again
+            limiter.pause(delay)
+        else:
+            time.sleep(delay)
+
+def close_client():
+    """Close the shared client and its pooled connections."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,402 @@
+from PIL import Image
+import json
+import logging
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+import analysis_engine
+import http_client
+import image_preprocess
+import job_workspace
+import response_cache
+import structured_output
+import table_store
+
+__all__ = [
+    "AnalysisSide",
+    "ANALYSIS_SIDES",
+    "encode_image",
+    "get_image_dimensions",
+    "request_analysis",
+    "analyze_image",
+    "analyze_jobs",
+    "analyze_images",
+    "analyses_to_dataframe",
+    "json_to_excel",
+    "analyze_sides",
+    "is_complete",
+    "main",
+]
+
+IMAGE_ANALYSES_KEY = "Image Analyses"
+
+# One side of the comparison: its images, prompt, user message template
+# (formatted with width, height and image) and output files; the paths are
+# relative to the job workspace
+AnalysisSide = namedtuple(
+    "AnalysisSide",
+    ["name", "image_paths", "system_message", "user_message_template", "json_file_path", "excel_file_path", "table_name"]
+)
+
+# System Message for Brutal Analysis
+PRODUCT_SYSTEM_MESSAGE = """
+Analyze the branding, content marketing, and social media marketing effectiveness of a company for the provided Instagram post image.
+Evaluate it with extreme scrutiny, judging harshly and penalizing even minor mistakes or deviations. Scores (0-10) should reflect an unforgiving critique.
+A score of 10 should be nearly unattainable, and anything below basic industry standards should score no more than 5. BUT GIVE GOOD SCORE WHEREVER THEY REALLY REALLY DESERVE IT.
+The final evaluation must highlight deficiencies prominently, even if they appear minor.
+
+### Categories and Criteria:
+#### Branding:
+- **Logo Usage**: Penalize heavily if the logo is not perfectly sized, clearly visible, or appropriately placed.
+- **Brand Colors**: Deduct points for any deviations or inconsistencies in brand colors.
+- **Typography**: Strictly penalize if fonts do not align with the brand identity or lack consistency.
+- **Brand Identity**: Judge if the design fails to reflect the unique persona of the brand.
+- **Visual Hierarchy**: Critique poor prioritization of key elements, even slightly.
+- **Template Consistency**: Penalize mismatched templates or lack of a uniform design approach.
+- **Messaging Alignment**: Deduct heavily for vague or inconsistent brand messaging.
+- **Subtle Branding**: Punish overly subtle or excessive branding.
+- **Overbranding**: Penalize for overwhelming, distracting brand elements.
+- **Variations**: Critique lack of variety or creative innovation in the post.
+
+#### Content Marketing:
+- **Content Visibility**: Penalize cluttered designs or poorly highlighted content.
+- **Engagement Cues**: Harshly judge unclear or missing calls-to-action.
+- **Information Overload**: Deduct for over-saturated visuals or excessive text.
+- **Storytelling**: Penalize weak, unengaging, or irrelevant narratives.
+- **Content Variety**: Deduct for monotony or repetition across posts.
+- **Typography Consistency**: Penalize for inconsistent or unattractive typography.
+- **Aesthetic Coherence**: Heavily penalize jarring or unappealing designs.
+- **Content Relevance**: Deduct for off-brand or irrelevant posts.
+- **Stock Elements**: Heavily penalize excessive reliance on generic or stock imagery.
+
+#### Social Media Marketing:
+- **Font Size**: Penalize unreadable or poorly sized text, even slightly.
+- **Visibility of Text**: Deduct for hard-to-read text due to placement or design choices.
+- **Logo Placement**: Harshly critique logos that disrupt the aesthetic.
+- **Consistency**: Deduct for designs that lack cohesion or consistency.
+- **Alignment**: Penalize for poorly aligned elements or uneven layouts.
+- **Aesthetic Appeal**: Heavily penalize designs that lack visual allure or professionalism.
+- **Brand Elements**: Critique insufficient or overused brand assets.
+- **Repetitiveness**: Harshly penalize repetitive themes or lack of creative diversity.
+
+### Output Format:
+Return the category scores and every criterion score (0-10) with a short explanation in the JSON structure of the response schema.
+"""
+
+# Example product information string
+product_information = "This product is an eco-friendly, high-performance water bottle designed to keep beverages cold for up to 24 hours. Made with BPA-free materials, it features a sleek design with a customizable logo space."
+
+# Competitor information (context for analysis)
+competitor_information = """
+The competitor is a leading brand in the digital marketing space known for its consistent visual branding and innovative designs on social media. They target a tech-savvy audience aged 20-35 with a focus on modern aesthetics, engaging storytelling, and minimalist yet powerful branding.
+"""
+
+COMPETITOR_SYSTEM_MESSAGE = """
+Analyze the branding, content marketing, and social media marketing effectiveness of a company for the provided Instagram post image.
+Evaluate it based on the following criteria and return a detailed JSON structure. Each criterion should have an individual score (0-10), and the total score for the category should be the average of its criteria.
+Give 9 or above only when it's extraordinary. Industry standard 7-8
+### Categories and Definitions:
+
+#### Branding:
+- **Logo Usage**: Is the logo perfectly sized, clearly visible, and well-positioned without being intrusive?
+- **Brand Colors**: Are brand colors used consistently and without deviations?
+- **Typography**: Are the fonts aligned with the brand identity, consistent in style, and visually appealing?
+- **Brand Identity**: Does the post effectively reflect the brand's unique persona and messaging?
+- **Visual Hierarchy**: Are key elements prioritized effectively to guide the viewer’s attention?
+- **Template Consistency**: Are templates consistent with previous posts, reflecting a uniform design approach?
+- **Messaging Alignment**: Is the brand messaging clear, consistent, and reflective of the brand's tone?
+- **Subtle Branding**: Does the branding strike the right balance (not overly subtle or excessive)?
+- **Overbranding**: Does the post avoid overwhelming and distracting brand elements?
+- **Variations**: Are there innovative and creative design variations in the post?
+
+#### Content Marketing:
+- **Content Visibility**: Is the primary content clear and highlighted effectively?
+- **Engagement Cues**: Are clear and compelling calls-to-action (CTAs) present and engaging?
+- **Information Overload**: Does the post avoid over-saturated visuals or excessive text?
+- **Storytelling**: Does the post convey a relevant and engaging narrative that resonates with the audience?
+- **Content Variety**: Are the posts diverse and free of monotonous or repetitive elements?
+- **Typography Consistency**: Is the typography visually attractive and consistent throughout the design?
+- **Aesthetic Coherence**: Do all elements harmonize to create a visually appealing composition?
+- **Content Relevance**: Is the content relevant to the brand and its target audience?
+- **Stock Elements**: Does the design avoid excessive use of generic or stock imagery?
+
+#### Social Media Marketing:
+- **Font Size**: Are fonts appropriately sized and legible on various screen sizes?
+- **Visibility of Text**: Is the text easy to read, with proper contrast, placement, and spacing?
+- **Logo Placement**: Does the logo placement avoid disrupting the design's aesthetic appeal?
+- **Consistency**: Does the post maintain design cohesion across elements?
+- **Alignment**: Are elements aligned professionally, creating a balanced and clean layout?
+- **Aesthetic Appeal**: Is the overall design visually engaging and suitable for the platform?
+- **Brand Elements**: Are brand assets (like logos, icons, or visuals) used effectively and sparingly?
+- **Repetitiveness**: Does the design avoid repetitive themes and offer fresh creative ideas?
+
+### Output Format:
+Return the category scores and every criterion score (0-10) with a short explanation in the JSON structure of the response schema.
+"""
+
+# Sides analysed in one batch; they share the HTTP client, the response cache
+# and the request slots of analysis_engine
+ANALYSIS_SIDES = {
+    "product": AnalysisSide(
+        "product",
+        [f"data/product/image{i}.jpeg" for i in range(1, 7)],
+        PRODUCT_SYSTEM_MESSAGE,
+        "Analyze the Instagram post with dimensions {width}x{height} pixels. Image data: {image}"
+        " Product Information: " + product_information,
+        "Output File/json/product_analysis.json",
+        "Output File/excel/product_analysis.xlsx",
+        "product_analysis",
+    ),
+    "competitor": AnalysisSide(
+        "competitor",
+        [f"data/competitor/image{i}.jpeg" for i in range(1, 7)],
+        COMPETITOR_SYSTEM_MESSAGE,
+        "\n    Company Information: " + competitor_information
+        + "\n    Analyze the Instagram post with dimensions {width}x{height} pixels. Image data: {image}\n    ",
+        "Output File/json/competitor_analysis.json",
+        "Output File/excel/competitor_analysis.xlsx",
+        "competitor_analysis",
+    ),
+}
+
+# Function to encode the image to base64
+def encode_image(image_path):
+    return image_preprocess.preprocess_image(image_path)[1]
+
+# Function to get image dimensions
+def get_image_dimensions(image_path):
+    try:
+        with Image.open(image_path) as img:
+            return img.size  # returns (width, height)
+    except Exception as e:
+        logging.error(f"Failed to get dimensions for image {image_path}: {e}")
+        return (0, 0)
+
+# Function to request analysis from OpenAI API
+def request_analysis(system_message, user_message, model="gpt-4o-mini", max_tokens=structured_output.ANALYSIS_MAX_TOKENS):
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ],
+        "max_tokens": max_tokens,
+        "response_format": structured_output.ANALYSIS_RESPONSE_FORMAT
+    }
+    logging.debug(f"Payload Sent: {json.dumps(payload, indent=4)}")
+
+    # Same endpoint, image, prompt, model and product information: reuse the stored response
+    # (replies of the stand-in server never answer requests to the real API)
+    cache_key = response_cache.make_key(http_client.API_URL, json.dumps(payload, sort_keys=True))
+    cached_response = response_cache.get(cache_key)
+    if cached_response is not None:
+        logging.info("Using cached analysis response.")
+        return cached_response
+
+    response = http_client.post_chat_completion(payload)
+
+    if response.status_code == 200:
+        try:
+            choice = response.json().get("choices", [{}])[0]
+            content = choice.get("message", {}).get("content")
+            if content is None:
+                return "Unexpected response format"
+            # Only complete replies matching the schema are stored; a truncated or
+            # invalid one is asked for again on the next run
+            if choice.get("finish_reason") == "stop":
+                try:
+                    structured_output.parse_analysis(content)
+                    response_cache.put(cache_key, content)
+                except ValueError:
+                    pass
+            else:
+                logging.warning(f"Analysis reply ended with finish_reason={choice.get('finish_reason')!r}.")
+            return content
+        except Exception as e:
+            logging.error(f"Error parsing response: {e}")
+            logging.debug(f"Raw Response: {response.text}")
+            return "Error parsing the response."
+    else:
+        logging.error(f"API Error: {response.status_code}, {response.text}")
+        return "Error with the API request."
+
+# Function to analyze a single image of one side, preprocessed by image_preprocess
+def analyze_image(side, prepared_image):
+    image_path, base64_image, (width, height) = prepared_image
+    if not base64_image:
+        return {
+            "Image": image_path,
+            "Analysis": "Failed to encode image."
+        }
+
+    user_message = side.user_message_template.format(width=width, height=height, image=base64_image)
+
+    try:
+        analysis_result = analysis_engine.run_limited(request_analysis, side.system_message, user_message)
+        try:
+            # Parse result and ensure it matches the response schema
+            parsed_result = structured_output.parse_analysis(analysis_result)
+        except ValueError as err:
+            logging.warning(f"Response does not match the analysis schema for {image_path}: {err}")
+            parsed_result = {"Raw Response": analysis_result}
+
+        return {
+            "Image": image_path,
+            "Analysis": parsed_result
+        }
+    except Exception as err:
+        logging.error(f"Error analyzing image {image_path}: {err}")
+        return {
+            "Image": image_path,
+            "Analysis": "Error analyzing the image."
+        }
+
+def analyze_jobs(jobs, workspace=None):
+    """
+    Analyze a batch of (side name, image path) jobs together.
+
+    All images are decoded in one batch on the shared process pool and all
+    requests run concurrently under the shared request slots.
+
+    Args:
+        jobs: Iterable of (side name, image path) pairs; side names are keys of ANALYSIS_SIDES.
+        workspace: Job workspace the image paths are relative to; the shared tree when not given.
+
+    Returns:
+        dict: {side name: {"Image Analyses": [...]}}, analyses in job order. The
+            "Image" of every analysis is the workspace-relative path.
+    """
+    jobs = list(jobs)
+    workspace = job_workspace.get(workspace)
+    prepared_images = [
+        (image_path, base64_image, dimensions)
+        for (_, image_path), (_, base64_image, dimensions) in zip(
+            jobs, image_preprocess.preprocess_images([workspace.path(image_path) for _, image_path in jobs])
+        )
+    ]
+    results = analysis_engine.analyze_concurrently(
+        lambda job: analyze_image(ANALYSIS_SIDES[job[0]], job[1]),
+        [(side_name, prepared_image) for (side_name, _), prepared_image in zip(jobs, prepared_images)]
+    )
+
+    outputs = {side_name: {IMAGE_ANALYSES_KEY: []} for side_name, _ in jobs}
+    for (side_name, _), result in zip(jobs, results):
+        outputs[side_name][IMAGE_ANALYSES_KEY].append(result)
+    return outputs
+
+# Function to analyze every image of one side concurrently and collect the structured output
+def analyze_images(image_paths, side_name="product", workspace=None):
+    return analyze_jobs(((side_name, image_path) for image_path in image_paths), workspace).get(
+        side_name, {IMAGE_ANALYSES_KEY: []}
+    )
+
+
+def analyses_to_dataframe(data):
+    """
+    Convert the structured analyses into a DataFrame with float score columns and the analysis text.
+
+    Args:
+        data (dict): Structured output with an "Image Analyses" list.
+
+    Returns:
+        pd.DataFrame: One row per image with a column per criterion; scores of
+            analyses that failed validation are NaN.
+    """
+    rows = []
+    for analysis in data.get(IMAGE_ANALYSES_KEY, []):
+        result = analysis.get("Analysis")
+        row = {"Image": analysis.get("Image", "Unknown"), structured_output.RESPONSE_COLUMN: ""}
+        if isinstance(result, dict) and "Raw Response" not in result:
+            row.update(structured_output.analysis_scores(result))
+            row[structured_output.RESPONSE_COLUMN] = structured_output.analysis_text(result)
+        rows.append(row)
+
+    columns = ["Image", structured_output.RESPONSE_COLUMN] + structured_output.SCORE_COLUMNS
+    df = pd.DataFrame(rows, columns=columns)
+    df[structured_output.SCORE_COLUMNS] = df[structured_output.SCORE_COLUMNS].astype(float)
+    return df
+
+
+def json_to_excel(json_file, excel_file):
+    """
+    Parse the JSON file and convert it to an Excel file with the structured scores.
+
+    Args:
+        json_file (str): Path to the input JSON file.
+        excel_file (str): Path to the output Excel file.
+
+    Returns:
+        pd.DataFrame: The DataFrame written to the Excel file.
+    """
+    # Load JSON data from the file
+    with open(json_file, 'r') as file:
+        data = json.load(file)
+
+    df = analyses_to_dataframe(data)
+
+    # Write the score columns to Excel; the analysis text stays in the JSON file
+    df.drop(columns=[structured_output.RESPONSE_COLUMN]).to_excel(excel_file, index=False)
+    print(f"Data successfully written to {excel_file}")
+    return df
+
+# Function to save the JSON, score table and optional Excel outputs of one side
+def save_side_outputs(side, output_structure, workspace=None):
+    workspace = job_workspace.get(workspace)
+
+    # Write structured output to file
+    json_file_path = workspace.path(side.json_file_path)
+    os.makedirs(os.path.dirname(json_file_path), exist_ok=True)
+    with open(json_file_path, "w") as f:
+        json.dump(output_structure, f, indent=4)
+
+    logging.info(f"Analysis completed and saved to {os.path.basename(side.json_file_path)}")
+
+    # Store the scores for the next stages straight from the in-memory results
+    df = analyses_to_dataframe(output_structure)
+    table_path = table_store.write_table(df, side.table_name, workspace)
+    print(f"Data successfully written to {table_path}")
+    table_store.export_excel(
+        df.drop(columns=[structured_output.RESPONSE_COLUMN]), workspace.path(side.excel_file_path)
+    )
+    return df
+
+def analyze_sides(side_names=tuple(ANALYSIS_SIDES), workspace=None):
+    """
+    Analyze the images of the given sides in one batch and save each side's outputs.
+
+    Images are read from, and outputs written to, the given job workspace
+    (the shared tree when not given).
+
+    Returns:
+        dict: {side name: score DataFrame}.
+    """
+    jobs = [
+        (side_name, image_path)
+        for side_name in side_names
+        for image_path in ANALYSIS_SIDES[side_name].image_paths
+    ]
+    outputs = analyze_jobs(jobs, workspace)
+    return {
+        side_name: save_side_outputs(
+            ANALYSIS_SIDES[side_name], outputs.get(side_name, {IMAGE_ANALYSES_KEY: []}), workspace
+        )
+        for side_name in side_names
+    }
+
+# Function to tell the stage cache whether a run may be stored
+def is_complete(scores):
+    """False if an image has no scores (failed or invalid response), so the next run asks again."""
+    return not any(df[structured_output.SCORE_COLUMNS].isna().all(axis=1).any() for df in scores)
+
+def main(workspace=None):
+    """Analyze the product and competitor images together and return (product_data, competitor_data)."""
+    scores = analyze_sides(("product", "competitor"), workspace)
+    return scores["product"], scores["competitor"]
+
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    main()
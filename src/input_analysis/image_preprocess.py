@@ -0,0 +1,82 @@
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+# Size and quality of the thumbnails sent to the model
+THUMBNAIL_SIZE = (800, 800)
+JPEG_QUALITY = 85
+
+# Worker processes decoding images; 0 decodes in the calling thread
+PREPROCESS_WORKERS = int(os.environ.get("IMAGE_PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+
+# One pool per process, shared by the product and competitor analyses
+_pool = None
+_pool_lock = threading.Lock()
+
+def preprocess_image(image_path):
+    """
+    Decode an image once and return its thumbnail as base64 together with its original size.
+
+    For JPEGs, draft mode lets the decoder downscale by 1/2, 1/4 or 1/8 while
+    decoding, so full-resolution pixels are never materialised.
+
+    Returns:
+        (image_path, base64 string, (width, height)); (image_path, None, (0, 0)) on failure.
+    """
+    try:
+        with Image.open(image_path) as img:
+            size = img.size  # Original dimensions, read from the header
+            img.draft("RGB", THUMBNAIL_SIZE)
+            img.thumbnail(THUMBNAIL_SIZE)  # Resize image
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+        # Encode straight from the buffer's memory instead of a copy of it
+        return image_path, base64.b64encode(buffer.getbuffer()).decode("ascii"), size
+    except Exception as e:
+        logging.error(f"Failed to encode image {image_path}: {e}")
+        return image_path, None, (0, 0)
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers are safe to start from the pipeline's threads
+            _pool = ProcessPoolExecutor(
+                max_workers=PREPROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def preprocess_images(image_paths):
+    """
+    Preprocess every image on the shared process pool.
+
+    Returns:
+        List of preprocess_image results, in the order of image_paths.
+    """
+    image_paths = list(image_paths)
+    if PREPROCESS_WORKERS <= 0 or len(image_paths) <= 1:
+        return [preprocess_image(image_path) for image_path in image_paths]
+    try:
+        return list(_get_pool().map(preprocess_image, image_paths))
+    except BrokenProcessPool as e:
+        logging.warning(f"Image preprocessing pool failed ({e}); decoding in process.")
+        shutdown_pool()
+        return [preprocess_image(image_path) for image_path in image_paths]
+
+def shutdown_pool():
+    """Stop the worker processes of the shared pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
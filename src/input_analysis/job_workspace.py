@@ -0,0 +1,73 @@
+import os
+import shutil
+import uuid
+
+__all__ = ["Workspace", "DEFAULT_WORKSPACE", "JOBS_DIR", "get", "create", "remove"]
+
+# Every queued report gets its own copy of the data/, Output File/ and src/ output tree here
+JOBS_DIR = os.environ.get("JOB_WORKSPACES_DIR", "data/jobs")
+
+class Workspace:
+    """
+    The directory one report run reads its uploads from and writes its outputs to.
+
+    Stages keep naming their files relative to the repository root
+    ("data/product/image1.jpeg", "Output File/parquet/...", "src/Report/report.pdf")
+    and resolve them with path(), so two runs in different workspaces never touch
+    the same file. Paths are resolved explicitly instead of changing the working
+    directory, which is shared by every thread of the process. Static assets
+    (template images, report_stats pages) are not part of a workspace.
+    """
+
+    def __init__(self, root="."):
+        self.root = root
+
+    def path(self, relative_path):
+        """Resolve a repository-relative output or upload path inside the workspace."""
+        return os.path.normpath(os.path.join(self.root, relative_path))
+
+    def makedirs(self, relative_dir):
+        """Create a directory of the workspace and return its resolved path."""
+        path = self.path(relative_dir)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def __repr__(self):
+        return f"Workspace({self.root!r})"
+
+# The repository root itself: the shared paths used by the CLI and the standalone scripts
+DEFAULT_WORKSPACE = Workspace(".")
+
+# Function to fall back to the shared layout when no workspace is given
+def get(workspace=None):
+    return workspace if workspace is not None else DEFAULT_WORKSPACE
+
+def create(job_id=None):
+    """
+    Create a fresh workspace under JOBS_DIR.
+
+    Args:
+        job_id: Directory name, a new random id when not given.
+
+    Returns:
+        Workspace: The new, empty workspace.
+    """
+    workspace = Workspace(os.path.join(JOBS_DIR, job_id or uuid.uuid4().hex))
+    os.makedirs(workspace.root, exist_ok=True)
+    return workspace
+
+def remove(root):
+    """
+    Delete a job workspace created by create().
+
+    Roots outside JOBS_DIR (such as the shared tree ".") are never touched.
+
+    Returns:
+        bool: True if a directory was deleted.
+    """
+    jobs_dir = os.path.abspath(JOBS_DIR)
+    path = os.path.abspath(root)
+    if os.path.dirname(path) != jobs_dir or not os.path.isdir(path):
+        return False
+    shutil.rmtree(path, ignore_errors=True)
+    return True
@@ -1,68 +1,101 @@
+import io
+import json
 import os
+import re
 
-# Define the paths
+import job_workspace
+
+__all__ = ["read_input_files", "split_categories", "main"]
+
+# Define the paths (relative to the job workspace)
 input_dir = 'data/top_3_images'
 output_dir = 'data/output_generated_file'
+responses_path = os.path.join(input_dir, 'top_3_responses.json')
+
+# One pattern for the category headings; the alternatives are tried in order, so
+# a line mentioning several categories goes to the first one, as before
+CATEGORY_PATTERN = re.compile(r"^(?=.*(Branding))|^(?=.*(Content Marketing))|^(?=.*(Social Media Marketing))")
+
+# Output file suffix of every category
+CATEGORY_FILES = {
+    'Branding': 'branding',
+    'Content Marketing': 'content_marketing',
+    'Social Media Marketing': 'smm',
+}
+
+# Size of the write buffer of the category files
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def read_input_files(workspace=None):
+    """Read the batched {filename: content} responses of the 'D' folder."""
+    with open(job_workspace.get(workspace).path(responses_path), 'r') as file:
+        return json.load(file)
+
+# Function to split one response into category sections without materializing its lines
+def split_categories(file_content, sections):
+    """
+    Append the lines of one response to the sections of their category.
+
+    A line starting a new category heading switches the current category;
+    lines before the first heading are dropped.
+    """
+    current_lines = None
+    for line in io.StringIO(file_content):
+        match = CATEGORY_PATTERN.match(line)
+        if match:
+            current_lines = sections[match.group(match.lastindex)]
+        if current_lines is not None:
+            current_lines.append(line.rstrip('\n'))
+
+def main(responses=None, workspace=None):
+    """
+    Split the raw responses into Branding / Content Marketing / Social Media Marketing files.
 
-# Ensure output directory exists
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
+    The sections of all product (and all competitor) responses are aggregated,
+    and every category file is written once.
 
-# Loop over all .txt files in the 'D' folder
-for filename in os.listdir(input_dir):
-    if filename.endswith('.txt'):
-        file_path = os.path.join(input_dir, filename)
+    Args:
+        responses: Optional {filename: content} dict; the 'D' folder is read when not given.
+        workspace: Job workspace of the run; the shared tree when not given.
 
-        # Read the content of each text file
-        with open(file_path, 'r') as file:
-            file_content = file.read()
+    Returns:
+        Dict mapping the workspace-relative path of every written output file to its content.
+    """
+    workspace = job_workspace.get(workspace)
 
+    # Ensure output directory exists
+    workspace.makedirs(output_dir)
+
+    if responses is None:
+        responses = read_input_files(workspace)
+
+    # One list of chunks per side and category; one chunk per response with that category
+    chunks = {side: {category: [] for category in CATEGORY_FILES} for side in ('Product', 'Competitor')}
+
+    for filename, file_content in responses.items():
         # Determine if it's a product or competitor
-        is_product = 'product' in filename.lower()
-        if is_product:
-            branding_file = os.path.join(output_dir, 'Product_branding.txt')
-            content_marketing_file = os.path.join(output_dir, 'Product_content_marketing.txt')
-            smm_file = os.path.join(output_dir, 'Product_smm.txt')
-        else:
-            branding_file = os.path.join(output_dir, 'Competitor_branding.txt')
-            content_marketing_file = os.path.join(output_dir, 'Competitor_content_marketing.txt')
-            smm_file = os.path.join(output_dir, 'Competitor_smm.txt')
-
-        # Split the content into lines
-        lines = file_content.split('\n')
-
-        # Prepare content variables for each category
-        branding_content = []
-        content_marketing_content = []
-        smm_content = []
-
-        current_category = None
-
-        # Iterate over lines to categorize them based on detected categories
-        for line in lines:
-            if "Branding" in line:
-                current_category = 'Branding'
-            elif "Content Marketing" in line:
-                current_category = 'Content Marketing'
-            elif "Social Media Marketing" in line:
-                current_category = 'Social Media Marketing'
-
-            # Append line to the corresponding category
-            if current_category == 'Branding':
-                branding_content.append(line)
-            elif current_category == 'Content Marketing':
-                content_marketing_content.append(line)
-            elif current_category == 'Social Media Marketing':
-                smm_content.append(line)
-
-        # Write the extracted data into their respective files (overwrite the files)
-        with open(branding_file, 'w') as bf:  # 'w' mode will overwrite the file
-            bf.write('\n'.join(branding_content) + '\n\n')  # Add the new content
-
-        with open(content_marketing_file, 'w') as cmf:  # 'w' mode will overwrite the file
-            cmf.write('\n'.join(content_marketing_content) + '\n\n')
-
-        with open(smm_file, 'w') as smf:  # 'w' mode will overwrite the file
-            smf.write('\n'.join(smm_content) + '\n\n')
-
-        print(f"Processed {filename} and saved data into {branding_file}, {content_marketing_file}, and {smm_file}")
+        side = 'Product' if 'product' in filename.lower() else 'Competitor'
+
+        sections = {category: [] for category in CATEGORY_FILES}
+        split_categories(file_content, sections)
+        for category, category_lines in sections.items():
+            if category_lines:
+                chunks[side][category].append('\n'.join(category_lines) + '\n\n')
+
+        print(f"Processed {filename}")
+
+    written = {}
+
+    # Write every category file once
+    for side, categories in chunks.items():
+        for category, category_chunks in categories.items():
+            output_file = os.path.join(output_dir, f'{side}_{CATEGORY_FILES[category]}.txt')
+            with open(workspace.path(output_file), 'w', buffering=WRITE_BUFFER_SIZE) as f:
+                f.writelines(category_chunks)
+            written[output_file] = ''.join(category_chunks)
+
+    print(f"Saved the category sections of {len(responses)} responses into {workspace.path(output_dir)}")
+    return written
+
+if __name__ == "__main__":
+    main()
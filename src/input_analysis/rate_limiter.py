@@ -0,0 +1,116 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+# Budgets of the API key, shared by every request made in this process
+REQUESTS_PER_MINUTE = float(os.environ.get("OPENAI_RPM", "500"))
+TOKENS_PER_MINUTE = float(os.environ.get("OPENAI_TPM", "200000"))
+
+# Exponential backoff bounds, in seconds
+BACKOFF_BASE = float(os.environ.get("OPENAI_BACKOFF_BASE", "1"))
+BACKOFF_MAX = float(os.environ.get("OPENAI_BACKOFF_MAX", "60"))
+
+class TokenBucket:
+    """Budget refilled continuously up to `capacity` per minute."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.tokens = capacity
+        self.rate = capacity / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount, now):
+        """Take `amount` from the bucket and return how long to wait until it is covered."""
+        self.refill(now)
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def limit_to(self, remaining, now):
+        """Align the bucket with the remaining budget reported by the server."""
+        self.refill(now)
+        self.tokens = min(self.tokens, remaining)
+
+def parse_duration(value):
+    """Parse rate-limit reset values such as "20ms", "1.5s" or "6m0s" into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+def estimate_tokens(payload):
+    """Rough token cost of a request: ~4 characters per prompt token plus the completion budget."""
+    return len(json.dumps(payload.get("messages", []))) / 4 + payload.get("max_tokens", 0)
+
+class RateLimiter:
+    """
+    Client-side scheduler for one API key.
+
+    Requests wait for both the requests-per-minute and tokens-per-minute
+    buckets, the buckets follow the x-ratelimit-* headers the API returns, and
+    a 429 pauses every caller until its Retry-After has passed instead of
+    letting each thread retry on its own.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self._lock = threading.Lock()
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+
+    def acquire(self, tokens):
+        """Block until a request costing `tokens` fits in the budgets."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.request_bucket.reserve(1, now),
+                self.token_bucket.reserve(tokens, now),
+                self.blocked_until - now
+            )
+        if wait > 0:
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """Apply the remaining budgets and reset times reported by the API."""
+        with self._lock:
+            now = time.monotonic()
+            for kind, bucket in (("requests", self.request_bucket), ("tokens", self.token_bucket)):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                bucket.limit_to(remaining, now)
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining <= 0 and reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Retry-After when the server sent one, full-jitter exponential backoff otherwise."""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, BACKOFF_BASE)
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def pause(self, delay):
+        """Hold back every caller for `delay` seconds (after a 429)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+# Shared by every model call site in this process
+limiter = RateLimiter()
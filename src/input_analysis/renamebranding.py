@@ -1,63 +1,83 @@
-import pandas as pd
+import json
 import os
 import re  # For sanitizing the filenames
 
-# Define file paths
-product_analysis_path = "Output File/excel/product_analysis.xlsx"
-competitor_analysis_path = "Output File/excel/competitor_analysis.xlsx"
-top_3_df_path = "Output File/excel/top_3_sd_results.xlsx"
+import job_workspace
+import table_store
 
-# Read the data from Excel files
-product_data = pd.read_excel(product_analysis_path)
-competitor_data = pd.read_excel(competitor_analysis_path)
-top_3_df = pd.read_excel(top_3_df_path)
+__all__ = ["build_response_index", "collect_raw_responses", "save_responses", "main"]
 
-# Create directory D if not exists
+# Directory D for the selected raw responses, stored as one {filename: response} JSON file
+# (relative to the job workspace)
 output_dir = "data/top_3_images"
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-# Check columns to make sure we are accessing the correct data
-print("Product Data Columns:", product_data.columns)
-print("Competitor Data Columns:", competitor_data.columns)
+responses_path = os.path.join(output_dir, "top_3_responses.json")
 
 # Function to sanitize filenames (remove any invalid characters)
 def sanitize_filename(name):
     # Replace any character that's not alphanumeric, space, or underscore with an underscore
     return re.sub(r'[^\w\s-]', '_', name).strip().replace(' ', '_')
 
-# Process Product Image Names
-for image_name in top_3_df['Product_Image_Name']:
-    # Sanitize the image name to avoid invalid filename characters
-    sanitized_image_name = sanitize_filename(image_name)
-
-    # Fetch raw JSON response for the image in Product data by matching 'Image' column
-    product_response = product_data.loc[product_data['Image'] == image_name, 'Raw JSON Response'].values
-    if len(product_response) > 0:
-        raw_response = product_response[0]
-        if raw_response:  # Check if the response is not empty
-            with open(f"{output_dir}/{sanitized_image_name}.txt", 'w') as file:
-                file.write(raw_response)  # Write raw response as text
-            print(f"Saved Raw Text for Product image: {sanitized_image_name}")
-        else:
-            print(f"Empty Raw JSON Response for Product image: {sanitized_image_name}")
-    else:
-        print(f"Product image name '{image_name}' not found.")
-
-# Process Competitor Image Names
-for image_name in top_3_df['Competitor_Image_Name']:
-    # Sanitize the image name to avoid invalid filename characters
-    sanitized_image_name = sanitize_filename(image_name)
-
-    # Fetch raw JSON response for the image in Competitor data by matching 'Image' column
-    competitor_response = competitor_data.loc[competitor_data['Image'] == image_name, 'Raw JSON Response'].values
-    if len(competitor_response) > 0:
-        raw_response = competitor_response[0]
-        if raw_response:  # Check if the response is not empty
-            with open(f"{output_dir}/{sanitized_image_name}.txt", 'w') as file:
-                file.write(raw_response)  # Write raw response as text
-            print(f"Saved Raw Text for Competitor image: {sanitized_image_name}")
+# Function to build the image name -> raw response index of one side
+def build_response_index(data):
+    """Hash index on the 'Image' column; the first row of a repeated name wins."""
+    first_rows = data.drop_duplicates('Image')
+    return dict(zip(first_rows['Image'], first_rows['Raw JSON Response']))
+
+# Function to collect the raw responses of the selected images of one side
+def collect_raw_responses(image_names, response_index, label, responses):
+    for image_name in dict.fromkeys(image_names):
+        # Sanitize the image name to avoid invalid filename characters
+        sanitized_image_name = sanitize_filename(image_name)
+
+        if image_name not in response_index:
+            print(f"{label} image name '{image_name}' not found.")
+            continue
+
+        raw_response = response_index[image_name]
+        if isinstance(raw_response, str) and raw_response:  # Check if the response is not empty
+            responses[f"{sanitized_image_name}.txt"] = raw_response
+            print(f"Selected Raw Text for {label} image: {sanitized_image_name}")
         else:
-            print(f"Empty Raw JSON Response for Competitor image: {sanitized_image_name}")
-    else:
-        print(f"Competitor image name '{image_name}' not found.")
+            print(f"Empty Raw JSON Response for {label} image: {sanitized_image_name}")
+
+# Function to write all selected responses to one batch file
+def save_responses(responses, workspace=None):
+    workspace = job_workspace.get(workspace)
+    workspace.makedirs(output_dir)
+    path = workspace.path(responses_path)
+    with open(path, 'w') as file:
+        json.dump(responses, file, indent=4)
+    print(f"Saved {len(responses)} raw responses to {path}")
+
+def main(product_data=None, competitor_data=None, top_3_df=None, workspace=None):
+    """
+    Save the raw responses of the top SD images and return them keyed by file name.
+
+    Any DataFrame that is not passed in is read from the table store of the
+    job workspace (the shared tree when not given).
+    """
+    # Read the data from the table store
+    if product_data is None:
+        product_data = table_store.read_table("product_analysis", workspace)
+    if competitor_data is None:
+        competitor_data = table_store.read_table("competitor_analysis", workspace)
+    if top_3_df is None:
+        top_3_df = table_store.read_table("top_3_sd_results", workspace)
+
+    # Check columns to make sure we are accessing the correct data
+    print("Product Data Columns:", product_data.columns)
+    print("Competitor Data Columns:", competitor_data.columns)
+
+    responses = {}
+
+    # Process Product Image Names
+    collect_raw_responses(top_3_df['Product_Image_Name'], build_response_index(product_data), "Product", responses)
+
+    # Process Competitor Image Names
+    collect_raw_responses(top_3_df['Competitor_Image_Name'], build_response_index(competitor_data), "Competitor", responses)
+
+    save_responses(responses, workspace)
+    return responses
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# On-disk cache of model responses, shared by every process on the host
+CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", "data/response_cache.sqlite3")
+ENABLED = os.environ.get("RESPONSE_CACHE", "1") != "0"
+MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL", str(30 * 24 * 3600)))
+
+_connection = None
+_connection_lock = threading.Lock()
+
+def _get_connection():
+    """Open the cache database on first use (caller holds _connection_lock)."""
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+        _connection = sqlite3.connect(CACHE_PATH, timeout=30, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        _connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        _connection.commit()
+    return _connection
+
+def make_key(*parts):
+    """SHA-256 over the given strings (image data, prompts, model, product information...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else bytes(part)
+        digest.update(str(len(data)).encode("ascii") + b":")
+        digest.update(data)
+    return digest.hexdigest()
+
+def get(key):
+    """Return the cached response for key, or None when missing, expired or disabled."""
+    if not ENABLED:
+        return None
+    try:
+        with _connection_lock:
+            connection = _get_connection()
+            row = connection.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > TTL_SECONDS:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                connection.commit()
+                return None
+            connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            connection.commit()
+            return row[0]
+    except sqlite3.Error as e:
+        logging.warning(f"Response cache read failed: {e}")
+        return None
+
+def put(key, response):
+    """Store a response, then evict least recently used entries beyond MAX_BYTES."""
+    if not ENABLED:
+        return
+    size = len(response.encode("utf-8"))
+    now = time.time()
+    try:
+        with _connection_lock:
+            connection = _get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            connection.execute("DELETE FROM responses WHERE created < ?", (now - TTL_SECONDS,))
+            total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total_size > MAX_BYTES:
+                # Walk entries from least recently used until enough space is freed
+                to_delete = []
+                for entry_key, entry_size in connection.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used ASC"
+                ):
+                    if total_size <= MAX_BYTES:
+                        break
+                    to_delete.append((entry_key,))
+                    total_size -= entry_size
+                connection.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+            connection.commit()
+    except sqlite3.Error as e:
+        logging.warning(f"Response cache write failed: {e}")
@@ -0,0 +1,141 @@
+import json
+import math
+
+# Criteria scored for every category of an Instagram post analysis
+ANALYSIS_CRITERIA = {
+    "Branding": [
+        "Logo Usage", "Brand Colors", "Typography", "Brand Identity", "Visual Hierarchy",
+        "Template Consistency", "Messaging Alignment", "Subtle Branding", "Overbranding", "Variations"
+    ],
+    "Content Marketing": [
+        "Content Visibility", "Engagement Cues", "Information Overload", "Storytelling", "Content Variety",
+        "Typography Consistency", "Aesthetic Coherence", "Content Relevance", "Stock Elements"
+    ],
+    "Social Media Marketing": [
+        "Font Size", "Visibility of Text", "Logo Placement", "Consistency", "Alignment",
+        "Aesthetic Appeal", "Brand Elements", "Repetitiveness"
+    ],
+}
+
+# Column holding the readable analysis text used by the category splitter
+RESPONSE_COLUMN = "Raw JSON Response"
+
+# Score columns of the analysis tables: the category score, then its criteria
+SCORE_COLUMNS = [
+    column
+    for category, criteria in ANALYSIS_CRITERIA.items()
+    for column in [f"{category} Score", *criteria]
+]
+
+# Completion budget of one analysis: about 128 tokens per scored item (score,
+# explanation and JSON keys), so the strict schema is never cut off mid-object
+ANALYSIS_MAX_TOKENS = 128 * len(SCORE_COLUMNS)
+
+# A score with its explanation
+SCORED_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "number"},
+        "explanation": {"type": "string"},
+    },
+    "required": ["score", "explanation"],
+    "additionalProperties": False,
+}
+
+# Function to build the schema of one category
+def category_schema(criteria):
+    return {
+        "type": "object",
+        "properties": {
+            "score": {"type": "number"},
+            "explanation": {"type": "string"},
+            "criteria": {
+                "type": "object",
+                "properties": {criterion: SCORED_ITEM_SCHEMA for criterion in criteria},
+                "required": list(criteria),
+                "additionalProperties": False,
+            },
+        },
+        "required": ["score", "explanation", "criteria"],
+        "additionalProperties": False,
+    }
+
+# response_format of the analysis requests (chat completions structured outputs)
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "post_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                category: category_schema(criteria) for category, criteria in ANALYSIS_CRITERIA.items()
+            },
+            "required": list(ANALYSIS_CRITERIA),
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Function to validate one score with its explanation
+def parse_scored_item(item, name):
+    if not isinstance(item, dict):
+        raise ValueError(f"{name}: expected an object, got {type(item).__name__}")
+    score = item.get("score")
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not math.isfinite(score):
+        raise ValueError(f"{name}: invalid score {score!r}")
+    explanation = item.get("explanation", "")
+    if not isinstance(explanation, str):
+        raise ValueError(f"{name}: explanation must be a string")
+    return {"score": float(score), "explanation": explanation}
+
+def parse_analysis(content):
+    """
+    Parse and validate a structured analysis response.
+
+    Args:
+        content (str | dict): Message content returned for ANALYSIS_RESPONSE_FORMAT.
+
+    Returns:
+        dict: {category: {"score", "explanation", "criteria": {criterion: {"score", "explanation"}}}}
+            with float scores.
+
+    Raises:
+        ValueError: If the content is not valid JSON or does not match the schema.
+    """
+    data = json.loads(content) if isinstance(content, str) else content
+    if not isinstance(data, dict):
+        raise ValueError("Analysis must be a JSON object")
+
+    analysis = {}
+    for category, criteria in ANALYSIS_CRITERIA.items():
+        category_data = data.get(category)
+        parsed = parse_scored_item(category_data, category)
+        criteria_data = category_data.get("criteria")
+        if not isinstance(criteria_data, dict):
+            raise ValueError(f"{category}: missing criteria")
+        parsed["criteria"] = {
+            criterion: parse_scored_item(criteria_data.get(criterion), criterion) for criterion in criteria
+        }
+        analysis[category] = parsed
+    return analysis
+
+# Function to flatten a parsed analysis into {score column: float}
+def analysis_scores(analysis):
+    scores = {}
+    for category, category_data in analysis.items():
+        scores[f"{category} Score"] = category_data["score"]
+        for criterion, item in category_data["criteria"].items():
+            scores[criterion] = item["score"]
+    return scores
+
+# Function to render a parsed analysis as the "criteria": score, explanation text
+def analysis_text(analysis):
+    """Readable text with one category heading per section, as split by path.py."""
+    lines = []
+    for category, category_data in analysis.items():
+        lines.append(f'"{category} Score": {category_data["score"]:g}, {category_data["explanation"]}')
+        for criterion, item in category_data["criteria"].items():
+            lines.append(f'"{criterion}": {item["score"]:g}, {item["explanation"]}')
+        lines.append("")
+    return "\n".join(lines)
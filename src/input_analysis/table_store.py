@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+
+import job_workspace
+
+# Tables passed between stages are stored as Parquet files in this directory
+TABLE_DIR = os.environ.get("TABLE_STORE_DIR", "Output File/parquet")
+# Set EXPORT_EXCEL=1 to also write the .xlsx copies of the tables
+EXPORT_EXCEL = os.environ.get("EXPORT_EXCEL", "0") != "0"
+
+# Function to get the file path of a stored table in a workspace (the shared tree by default)
+def table_path(name, workspace=None):
+    return job_workspace.get(workspace).path(os.path.join(TABLE_DIR, f"{name}.parquet"))
+
+# Function to store a table for the next stages
+def write_table(df, name, workspace=None):
+    """
+    Write a DataFrame to the columnar store.
+
+    Args:
+        df (pd.DataFrame): Table to store.
+        name (str): Table name, e.g. "product_analysis".
+        workspace: Job workspace of the run; the shared tree when not given.
+
+    Returns:
+        str: Path of the Parquet file.
+    """
+    path = table_path(name, workspace)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(path, index=False)
+    return path
+
+# Function to load a table written by an earlier stage
+def read_table(name, workspace=None):
+    return pd.read_parquet(table_path(name, workspace))
+
+# Function to export a table to Excel when the Excel deliverables are enabled
+def export_excel(df, excel_file):
+    """
+    Write the DataFrame to an Excel file if EXPORT_EXCEL is set.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    if not EXPORT_EXCEL:
+        return False
+    folder = os.path.dirname(excel_file)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    df.to_excel(excel_file, index=False)
+    print(f"Data successfully written to {excel_file}")
+    return True
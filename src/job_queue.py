@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+__all__ = ["submit", "claim", "finish", "get", "finished_between", "heartbeat", "worker_alive", "requeue_abandoned"]
+
+# Report jobs waiting for, or handled by, the worker (src/worker.py); shared by
+# every process on the host, no broker needed
+QUEUE_PATH = os.environ.get("JOB_QUEUE_PATH", "data/jobs.sqlite3")
+# A worker whose last heartbeat is older than this is considered gone
+WORKER_TIMEOUT = float(os.environ.get("WORKER_TIMEOUT", "60"))
+
+_connection = None
+_connection_lock = threading.Lock()
+
+def _get_connection():
+    """Open the queue database on first use (caller holds _connection_lock)."""
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(QUEUE_PATH) or ".", exist_ok=True)
+        # Autocommit mode: claims open their own BEGIN IMMEDIATE transaction
+        _connection = sqlite3.connect(QUEUE_PATH, timeout=30, check_same_thread=False, isolation_level=None)
+        _connection.row_factory = sqlite3.Row
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, company_name TEXT NOT NULL, params TEXT NOT NULL, "
+            "status TEXT NOT NULL, message TEXT NOT NULL DEFAULT '', worker TEXT, "
+            "created REAL NOT NULL, started REAL, finished REAL)"
+        )
+        _connection.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, pid INTEGER NOT NULL, heartbeat REAL NOT NULL)"
+        )
+    return _connection
+
+def _job(row):
+    """A jobs row as a dict, with its parameters decoded."""
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    return job
+
+def submit(company_name, **params):
+    """
+    Queue a report job.
+
+    Args:
+        company_name: Name printed on the report.
+        **params: Extra JSON-serialisable job parameters.
+
+    Returns:
+        str: The job id.
+    """
+    job_id = uuid.uuid4().hex
+    with _connection_lock:
+        _get_connection().execute(
+            "INSERT INTO jobs (id, company_name, params, status, created) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, company_name, json.dumps(params), time.time())
+        )
+    return job_id
+
+def claim(worker_id):
+    """Atomically take the oldest queued job for worker_id; returns the job dict or None."""
+    with _connection_lock:
+        connection = _get_connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started = ? WHERE id = ?",
+                    (worker_id, time.time(), row["id"])
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+    job = _job(row)
+    if job is not None:
+        job.update(status="running", worker=worker_id)
+    return job
+
+def finish(job_id, status, message=""):
+    """Mark a job as "done" or "error"."""
+    with _connection_lock:
+        _get_connection().execute(
+            "UPDATE jobs SET status = ?, message = ?, finished = ? WHERE id = ?",
+            (status, message, time.time(), job_id)
+        )
+
+def get(job_id):
+    """Return the job dict (status, message, timestamps...) or None if unknown."""
+    with _connection_lock:
+        return _job(_get_connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+def finished_between(start, end):
+    """Return the jobs (dicts) that finished, done or failed, at a time in [start, end)."""
+    with _connection_lock:
+        rows = _get_connection().execute(
+            "SELECT * FROM jobs WHERE status IN ('done', 'error') AND finished >= ? AND finished < ?",
+            (start, end)
+        ).fetchall()
+    return [_job(row) for row in rows]
+
+def heartbeat(worker_id):
+    """Record that a worker is alive."""
+    with _connection_lock:
+        _get_connection().execute(
+            "INSERT OR REPLACE INTO workers (id, pid, heartbeat) VALUES (?, ?, ?)",
+            (worker_id, os.getpid(), time.time())
+        )
+
+def worker_alive():
+    """True if some worker sent a heartbeat within WORKER_TIMEOUT."""
+    with _connection_lock:
+        row = _get_connection().execute("SELECT MAX(heartbeat) FROM workers").fetchone()
+    return row[0] is not None and time.time() - row[0] < WORKER_TIMEOUT
+
+def requeue_abandoned():
+    """Put back the running jobs of workers that stopped sending heartbeats; returns their count."""
+    cutoff = time.time() - WORKER_TIMEOUT
+    with _connection_lock:
+        cursor = _get_connection().execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, started = NULL "
+            "WHERE status = 'running' AND worker NOT IN (SELECT id FROM workers WHERE heartbeat >= ?)",
+            (cutoff,)
+        )
+        return cursor.rowcount
@@ -0,0 +1,236 @@
+import contextlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# The helpers shared by the stages (table store, job workspaces, HTTP client...)
+# live in src/input_analysis; this is the one place that makes them importable,
+# for the pipeline's callers and for every stage script it loads
+HELPERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input_analysis")
+if HELPERS_DIR not in sys.path:
+    sys.path.insert(0, HELPERS_DIR)
+
+import stage_cache
+
+# A pipeline stage: its script, the outputs it takes as arguments, the output it
+# produces (a tuple of names when the script returns several), any outputs that only have to exist (files written by that stage),
+# the files it reads and the files it writes (glob patterns, for the stage cache),
+# the function of the script it calls, the environment variables that change its
+# output (hashed into the cache key) and, optionally, a function of the script that
+# returns False for an output that must not be cached (e.g. failed model calls)
+Stage = namedtuple(
+    "Stage",
+    ["name", "file", "inputs", "output", "after", "deps", "artifacts", "function", "settings", "check"],
+    defaults=[(), (), (), "main", (), None]
+)
+
+# Stage paths below are relative to the job workspace (the repository root by
+# default); every stage function takes it as the workspace keyword argument
+
+# Table store helper and the settings that decide where tables go
+TABLE_DEPS = ("src/input_analysis/table_store.py",)
+TABLE_SETTINGS = ("TABLE_STORE_DIR", "EXPORT_EXCEL")
+
+# Images embedded in the marketing templates
+TEMPLATE_DEPS = ("data/product/*.jpeg", "data/competitor/*.jpeg", "src/templates_images/*.png") + TABLE_DEPS
+
+# Stages of the report pipeline; a stage runs as soon as its inputs are ready
+STAGES = [
+    Stage("image_analysis", "src/input_analysis/image_analysis.py",
+          (), ("product_data", "competitor_data"),
+          deps=("data/product/*.jpeg", "data/competitor/*.jpeg", "src/input_analysis/structured_output.py",
+                "src/input_analysis/image_preprocess.py") + TABLE_DEPS,
+          artifacts=("Output File/json/product_analysis.json", "Output File/json/competitor_analysis.json",
+                     "Output File/parquet/product_analysis.parquet", "Output File/parquet/competitor_analysis.parquet",
+                     "Output File/excel/product_analysis.xlsx", "Output File/excel/competitor_analysis.xlsx"),
+          settings=("OPENAI_API_URL",) + TABLE_SETTINGS,
+          check="is_complete"),
+    Stage("Standarddeviation", "src/input_analysis/Standarddeviation.py",
+          ("product_data", "competitor_data"), "top_3_df",
+          deps=TABLE_DEPS,
+          artifacts=("Output File/parquet/top_3_sd_results.parquet", "Output File/excel/top_3_sd_results.xlsx",
+                     "data/output_generated_file/Output File/excel/top_3_sd_results.xlsx"),
+          settings=("SD_PAIR_METHOD",) + TABLE_SETTINGS),
+    Stage("renamebranding", "src/input_analysis/renamebranding.py",
+          ("product_data", "competitor_data", "top_3_df"), "top_3_responses",
+          deps=TABLE_DEPS,
+          artifacts=("data/top_3_images/top_3_responses.json",),
+          settings=TABLE_SETTINGS),
+    Stage("path", "src/input_analysis/path.py",
+          ("top_3_responses",), "category_sections",
+          artifacts=tuple(f"data/output_generated_file/{side}_{category}.txt"
+                          for side in ("Product", "Competitor")
+                          for category in ("branding", "content_marketing", "smm"))),
+    Stage("feedback", "src/input_analysis/feedback.py",
+          ("category_sections",), "cleaned_output",
+          artifacts=("data/output_generated_file/Product_donts_output_cleaned.txt",
+                     "data/output_generated_file/Product_output_cleaned.txt"),
+          settings=("OPENAI_API_URL", "SUGGESTIONS_MODEL", "FEEDBACK_MODE"),
+          check="is_complete"),
+    Stage("brand_html", "src/brand.py",
+          ("company_name", "top_3_df", "cleaned_output"), "brand_marketing_html",
+          deps=TEMPLATE_DEPS,
+          artifacts=("src/templates/brand_marketing.html",),
+          settings=TABLE_SETTINGS,
+          function="generate_html"),
+    Stage("brand_pdf", "src/brand.py",
+          ("company_name",), "brand_marketing_pdf",
+          ("brand_marketing_html",),
+          deps=("src/templates/brand_marketing.html",),
+          artifacts=("data/reports/template_ss/brand_marketing_screenshot.png",
+                     "data/reports/template_PDF/brand marketing.pdf"),
+          function="render_pdf"),
+    Stage("content_html", "src/content.py",
+          ("company_name", "top_3_df", "cleaned_output"), "content_marketing_html",
+          deps=TEMPLATE_DEPS,
+          artifacts=("src/templates/content_marketing.html",),
+          settings=TABLE_SETTINGS,
+          function="generate_html"),
+    Stage("content_pdf", "src/content.py",
+          ("company_name",), "content_marketing_pdf",
+          ("content_marketing_html",),
+          deps=("src/templates/content_marketing.html",),
+          artifacts=("data/reports/template_ss/content_marketing_screenshot.png",
+                     "data/reports/template_PDF/content marketing.pdf"),
+          function="render_pdf"),
+    Stage("social_html", "src/social.py",
+          ("company_name", "top_3_df", "cleaned_output"), "social_media_marketing_html",
+          deps=TEMPLATE_DEPS,
+          artifacts=("src/templates/social_marketing.html",),
+          settings=TABLE_SETTINGS,
+          function="generate_html"),
+    Stage("social_pdf", "src/social.py",
+          ("company_name",), "social_media_marketing_pdf",
+          ("social_media_marketing_html",),
+          deps=("src/templates/social_marketing.html",),
+          artifacts=("data/reports/template_ss/social_marketing_screenshot.png",
+                     "data/reports/template_PDF/social media marketing.pdf"),
+          function="render_pdf"),
+    Stage("updated1", "src/Report/updated1.py",
+          ("company_name",), "cover_pdf",
+          deps=("data/reports/report_stats/1.pdf",),
+          artifacts=("src/Report/overlay_test.pdf", "src/Report/1updated.pdf")),
+    Stage("Report", "src/Report/Report.py",
+          (), "report_pdf",
+          ("cover_pdf", "brand_marketing_pdf", "content_marketing_pdf", "social_media_marketing_pdf"),
+          deps=("src/Report/1updated.pdf", "data/reports/report_stats/*.pdf", "data/reports/template_PDF/*.pdf"),
+          artifacts=("src/Report/report.pdf",)),
+]
+
+# Number of stages allowed to run at the same time
+DEFAULT_MAX_WORKERS = 4
+
+# Stage modules already imported in this process, by file
+_loaded_stages = {}
+_load_lock = threading.Lock()
+
+def load_stage(stage):
+    """
+    Import a stage script once and return its module.
+
+    The stage directories are not packages (and some contain dashes), so the
+    modules are loaded straight from their file paths and kept for later runs.
+    """
+    with _load_lock:
+        if stage.file not in _loaded_stages:
+            # Like running the script directly: its own directory is importable
+            stage_dir = os.path.dirname(os.path.abspath(stage.file))
+            if stage_dir not in sys.path:
+                sys.path.insert(0, stage_dir)
+            module_name = os.path.splitext(os.path.basename(stage.file))[0]
+            spec = importlib.util.spec_from_file_location(module_name, stage.file)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _loaded_stages[stage.file] = module
+        return _loaded_stages[stage.file]
+
+def run_stage(stage, args, use_cache=True, stage_context=None, workspace=None):
+    """
+    Run a single stage with its input values and return its output.
+
+    With use_cache, a stage whose inputs hash to a cached entry is skipped and
+    its output and files are restored from the stage cache instead.
+    stage_context, if given, is called with the stage and must return a
+    context manager wrapped around the run (used for profiling).
+    workspace is the job workspace the stage reads and writes its files in
+    (the repository root when None).
+    """
+    root = workspace.root if workspace is not None else "."
+    with stage_context(stage) if stage_context else contextlib.nullcontext():
+        start = time.perf_counter()
+        if use_cache:
+            key = stage_cache.stage_key(stage, args, root)
+            hit, result = stage_cache.load(stage, key, root)
+            if hit:
+                print(f"{stage.name} restored from cache in {time.perf_counter() - start:.2f}s.")
+                return result
+
+        module = load_stage(stage)
+        result = getattr(module, stage.function)(*args, workspace=workspace)
+        if use_cache:
+            if stage.check and not getattr(module, stage.check)(result):
+                print(f"{stage.name} output is incomplete, not cached.")
+            else:
+                stage_cache.store(stage, key, result, root)
+        print(f"{stage.name} ({stage.file}) executed successfully in {time.perf_counter() - start:.2f}s.")
+        return result
+
+def ready_stages(pending, results):
+    """Return the pending stages whose inputs and dependencies are all available."""
+    return [
+        stage for stage in pending
+        if all(name in results for name in stage.inputs + stage.after)
+    ]
+
+def run_pipeline(company_name, max_workers=DEFAULT_MAX_WORKERS, stages=STAGES, use_cache=True, stage_context=None,
+                 workspace=None):
+    """
+    Run the stage graph in this interpreter, handing outputs along in memory.
+
+    Independent stages (the three templates and the cover page) run at the
+    same time on a thread pool, so the report takes as long as its slowest
+    chain of stages rather than the sum of all of them. Every file of the run
+    lives in the given job workspace, so runs in different workspaces can share
+    the process.
+
+    Args:
+        company_name: Name printed on the report.
+        max_workers: Maximum number of stages running at once.
+        stages: Stage graph to run.
+        use_cache: Skip stages whose inputs are unchanged since a cached run.
+        stage_context: Optional factory of a context manager wrapped around each stage.
+        workspace: Job workspace (job_workspace.Workspace); the repository root when None.
+
+    Returns:
+        Dict with the in-memory output of every stage, keyed by output name.
+    """
+    results = {"company_name": company_name}
+    pending = list(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for stage in ready_stages(pending, results):
+                pending.remove(stage)
+                args = [results[name] for name in stage.inputs]
+                running[executor.submit(run_stage, stage, args, use_cache, stage_context, workspace)] = stage
+
+            if not running:
+                missing = sorted({name for stage in pending for name in stage.inputs + stage.after} - set(results))
+                raise RuntimeError(f"Stages {[stage.name for stage in pending]} wait for missing outputs {missing}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                # Re-raises the stage's exception; pending stages are never started
+                result = future.result()
+                if isinstance(stage.output, tuple):
+                    results.update(zip(stage.output, result))
+                else:
+                    results[stage.output] = result
+
+    return results
@@ -0,0 +1,186 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+# Directory holding one entry per (stage, input hash)
+CACHE_DIR = "data/stage_cache"
+MAX_BYTES = int(os.environ.get("STAGE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+TTL_SECONDS = float(os.environ.get("STAGE_CACHE_TTL", str(30 * 24 * 3600)))
+
+def match_files(pattern, root="."):
+    """Return the files matched by a glob pattern under root, relative to root."""
+    return [
+        os.path.relpath(path, root)
+        for path in glob.glob(os.path.join(glob.escape(root), pattern))
+        if os.path.isfile(path)
+    ]
+
+def expand_patterns(patterns, root="."):
+    """Return the sorted files matched by a list of glob patterns under root, relative to root."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(match_files(pattern, root))
+    return sorted(paths)
+
+def update_digest(digest, value):
+    """Feed a stable, type-tagged representation of a stage input into the digest."""
+    if isinstance(value, pd.DataFrame):
+        digest.update(b"DataFrame")
+        digest.update(repr(list(value.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"dict")
+        for key in sorted(value, key=repr):
+            update_digest(digest, key)
+            update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"list")
+        for item in value:
+            update_digest(digest, item)
+    elif isinstance(value, bytes):
+        digest.update(b"bytes")
+        digest.update(value)
+    else:
+        digest.update(type(value).__name__.encode("utf-8"))
+        digest.update(repr(value).encode("utf-8"))
+
+def stage_key(stage, args, root="."):
+    """
+    Hash everything a stage's output depends on.
+
+    The key covers the stage's source file (prompts, model names and templates
+    live there), its in-memory inputs (upstream DataFrames and texts, company
+    name), the environment settings it depends on (endpoint, models, modes)
+    and the bytes of the files it reads (uploaded images, PDFs, helper modules).
+    Files are looked up in the job workspace root and hashed under their
+    relative path, so identical jobs share entries; a pattern with no match
+    there is looked up in the shared tree (template images, report pages).
+    """
+    digest = hashlib.sha256()
+    digest.update(stage.name.encode("utf-8"))
+    with open(stage.file, "rb") as f:
+        digest.update(f.read())
+    for arg in args:
+        update_digest(digest, arg)
+    for name in stage.settings:
+        update_digest(digest, (name, os.environ.get(name)))
+    dep_files = {}
+    for pattern in stage.deps:
+        base = root
+        paths = match_files(pattern, root)
+        if not paths and root != ".":
+            base = "."
+            paths = match_files(pattern, base)
+        dep_files.update((path, os.path.join(base, path)) for path in paths)
+    for path in sorted(dep_files):
+        digest.update(path.encode("utf-8"))
+        with open(dep_files[path], "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def load(stage, key, root="."):
+    """
+    Restore a cached stage run into the job workspace root.
+
+    Returns:
+        (True, output) with the stage's artifacts copied back in place, or
+        (False, None) when there is no entry for the key.
+    """
+    entry = os.path.join(CACHE_DIR, stage.name, key)
+    result_path = os.path.join(entry, "result.pkl")
+    if not os.path.exists(result_path):
+        return False, None
+
+    files_dir = os.path.join(entry, "files")
+    for dir_path, _, names in os.walk(files_dir):
+        for name in names:
+            cached_path = os.path.join(dir_path, name)
+            target_path = os.path.join(root, os.path.relpath(cached_path, files_dir))
+            os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+            shutil.copy2(cached_path, target_path)
+
+    # The mtime of result.pkl records the last use for the LRU eviction in prune()
+    try:
+        os.utime(result_path)
+    except OSError:
+        pass
+    with open(result_path, "rb") as f:
+        return True, pickle.load(f)
+
+def store(stage, key, result, root="."):
+    """Save a stage's output and the artifacts it wrote under root, then prune(); failures only log a warning."""
+    stage_dir = os.path.join(CACHE_DIR, stage.name)
+    entry = os.path.join(stage_dir, key)
+    os.makedirs(stage_dir, exist_ok=True)
+    # Hidden so prune() never mistakes a store in progress for an entry
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp", dir=stage_dir)
+    try:
+        for path in expand_patterns(stage.artifacts, root):
+            cached_path = os.path.join(tmp_dir, "files", path)
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            shutil.copy2(os.path.join(root, path), cached_path)
+        with open(os.path.join(tmp_dir, "result.pkl"), "wb") as f:
+            pickle.dump(result, f)
+        # Publish the entry in one step so readers never see half of it
+        os.replace(tmp_dir, entry)
+    except Exception as e:
+        logging.warning(f"Could not cache stage {stage.name}: {e}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    prune()
+
+# Function to measure the bytes one cache entry takes on disk
+def entry_size(entry):
+    size = 0
+    for dir_path, _, names in os.walk(entry):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(dir_path, name))
+            except OSError:
+                pass
+    return size
+
+def prune(max_bytes=None, ttl_seconds=None):
+    """
+    Delete entries created more than ttl_seconds ago, then evict least recently
+    used entries until the cache fits in max_bytes.
+
+    An entry's directory mtime is its creation time (nothing is added to it
+    afterwards) and its result.pkl mtime the time load() last used it.
+
+    Returns:
+        int: The number of entries deleted.
+    """
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    ttl_seconds = TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    now = time.time()
+    entries = []
+    removed = 0
+    for entry in glob.glob(os.path.join(glob.escape(CACHE_DIR), "*", "*")):
+        result_path = os.path.join(entry, "result.pkl")
+        try:
+            created = os.path.getmtime(entry)
+            last_used = os.path.getmtime(result_path)
+        except OSError:
+            continue
+        if now - created > ttl_seconds:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+        else:
+            entries.append((last_used, entry_size(entry), entry))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total_size <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= size
+        removed += 1
+    return removed
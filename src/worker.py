@@ -0,0 +1,144 @@
+import argparse
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+import browser
+import job_queue
+import pipeline
+
+import job_workspace
+
+__all__ = ["warm_up", "run_job", "work", "remove_expired_workspaces", "main"]
+
+# Seconds between queue polls of an idle worker thread
+POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1"))
+# Seconds between heartbeats (must stay well below job_queue.WORKER_TIMEOUT)
+HEARTBEAT_INTERVAL = float(os.environ.get("WORKER_HEARTBEAT_INTERVAL", "10"))
+# Reports run at the same time by one worker process; jobs submitted with a
+# workspace write only there, jobs without one share the repository tree
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", "1"))
+# Hours the workspace of a finished job is kept (its uploads, tables and PDFs)
+WORKSPACE_RETENTION_HOURS = float(os.environ.get("WORKSPACE_RETENTION_HOURS", "24"))
+# Seconds between two sweeps of expired workspaces
+CLEANUP_INTERVAL = float(os.environ.get("WORKSPACE_CLEANUP_INTERVAL", "600"))
+
+def warm_up(with_browser=True):
+    """Import every stage module (pandas, reportlab, PIL...) and launch Chromium once."""
+    start = time.perf_counter()
+    for stage in pipeline.STAGES:
+        pipeline.load_stage(stage)
+    if with_browser:
+        try:
+            browser.start_warm_browser()
+        except Exception as e:
+            logging.warning(f"Could not start the warm browser, screenshots will launch their own: {e}")
+    logging.info(f"Worker warmed up in {time.perf_counter() - start:.2f}s.")
+
+def run_job(job, use_cache=True):
+    """
+    Run the report pipeline for one claimed job and record the outcome in the queue.
+
+    The job's "workspace" parameter (see job_workspace.create) holds its uploads
+    and receives its outputs; without one the shared repository tree is used.
+    """
+    start = time.perf_counter()
+    workspace = job_workspace.Workspace(job["params"].get("workspace", "."))
+    logging.info(f"Job {job['id']} started for {job['company_name']} in {workspace.root}.")
+    try:
+        pipeline.run_pipeline(job["company_name"], use_cache=use_cache, workspace=workspace)
+    except Exception as e:
+        logging.exception(f"Job {job['id']} failed.")
+        job_queue.finish(job["id"], "error", f"{type(e).__name__}: {e}")
+        return False
+    job_queue.finish(job["id"], "done")
+    logging.info(f"Job {job['id']} done in {time.perf_counter() - start:.2f}s.")
+    return True
+
+def work(worker_id, stop, use_cache=True, once=False):
+    """Claim and run jobs until stop is set (or, with once, until the queue is empty)."""
+    while not stop.is_set():
+        job = job_queue.claim(worker_id)
+        if job is None:
+            if once:
+                return
+            stop.wait(POLL_INTERVAL)
+            continue
+        run_job(job, use_cache)
+
+# Function to put back the running jobs of workers that stopped sending heartbeats
+def requeue_abandoned_jobs():
+    requeued = job_queue.requeue_abandoned()
+    if requeued:
+        logging.info(f"Requeued {requeued} job(s) of workers that stopped.")
+    return requeued
+
+def remove_expired_workspaces(since=0.0, retention_hours=WORKSPACE_RETENTION_HOURS):
+    """
+    Delete the workspaces of jobs that finished more than retention_hours ago.
+
+    Only jobs that finished after since are looked at, so each sweep passes
+    the cutoff of the previous one and never rescans the whole history.
+
+    Returns:
+        float: The cutoff of this sweep, to pass as since next time.
+    """
+    cutoff = time.time() - retention_hours * 3600
+    removed = 0
+    for job in job_queue.finished_between(since, cutoff):
+        root = job["params"].get("workspace")
+        if root and job_workspace.remove(root):
+            removed += 1
+    if removed:
+        logging.info(f"Removed {removed} expired job workspace(s).")
+    return cutoff
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-lived report worker fed by the job queue.")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="reports run at the same time")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    parser.add_argument("--no-browser", action="store_true", help="do not keep a Chromium instance running")
+    parser.add_argument("--no-cache", action="store_true", help="re-run every stage even if its inputs are unchanged")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    job_queue.heartbeat(worker_id)
+    requeue_abandoned_jobs()
+
+    warm_up(with_browser=not args.no_browser)
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=work, args=(worker_id, stop, not args.no_cache, args.once), name=f"worker-{i}")
+        for i in range(max(1, args.concurrency))
+    ]
+    for thread in threads:
+        thread.start()
+
+    cleaned_until = 0.0
+    next_cleanup = time.time()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            job_queue.heartbeat(worker_id)
+            # Pick up the jobs of other workers that stopped while this one runs
+            requeue_abandoned_jobs()
+            if time.time() >= next_cleanup:
+                cleaned_until = remove_expired_workspaces(cleaned_until)
+                next_cleanup = time.time() + CLEANUP_INTERVAL
+            for thread in threads:
+                thread.join(HEARTBEAT_INTERVAL / len(threads))
+    except KeyboardInterrupt:
+        logging.info("Stopping after the running jobs.")
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        browser.stop_warm_browser()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,16 @@ import streamlit as st
 from PIL import Image
 import os
 import subprocess
+import sys
 import time
 
-# Constants for file paths and MIME types
+# The job queue lives with the pipeline in src, the job workspaces in src/input_analysis
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "input_analysis"))
+import job_queue
+import job_workspace
+
+# Constants for file paths (relative to the job workspace) and MIME types
 PDF_MIME_TYPE = "application/pdf"
 BRAND_MARKETING = "data/reports/template_PDF/brand marketing.pdf"
 CONTENT_MARKETING = "data/reports/template_PDF/content marketing.pdf"
@@ -12,32 +19,54 @@ SOCIAL_MEDIA_MARKETING = "data/reports/template_PDF/social media marketing.pdf"
 PRODUCT_IMAGES_DIR = "data/product"
 COMPETITOR_IMAGES_DIR = "data/competitor"
 REPORT = "src/Report/report.pdf"
-STATUS_FILE = "src/Report/status.txt"  # Path to the status file
-
-# Ensure directories for saving images exist
-os.makedirs(PRODUCT_IMAGES_DIR, exist_ok=True)
-os.makedirs(COMPETITOR_IMAGES_DIR, exist_ok=True)
-
-# Status checker function
-def check_status_file(timeout=600, interval=5):
-    """Monitor the status.txt file for completion or errors."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        if os.path.exists(STATUS_FILE):
-            with open(STATUS_FILE, "r") as f:
-                status = f.read().strip()
-                if status == "done":
-                    return "success"
-                elif status.startswith("error"):
-                    return status
-        time.sleep(interval)
-    return "timeout"
+
+# Start the report worker (src/worker.py) unless one is already running
+def ensure_worker():
+    if not job_queue.worker_alive():
+        subprocess.Popen([sys.executable, "src/worker.py"], start_new_session=True)
+
+# Seconds between two status checks of a queued or running report
+POLL_INTERVAL = 2
+
+# Function to offer the generated PDF reports of a finished job
+def show_downloads(workspace, company_name):
+    for report_name, label in [
+        (workspace.path(BRAND_MARKETING), f"{company_name} Brand Marketing Report"),
+        (workspace.path(CONTENT_MARKETING), f"{company_name} Content Marketing Report"),
+        (workspace.path(SOCIAL_MEDIA_MARKETING), f"{company_name} Social Media Marketing Report")
+    ]:
+        if os.path.exists(report_name):
+            with open(report_name, "rb") as report_file:
+                st.download_button(
+                    label=f"Download {label}",
+                    data=report_file,
+                    file_name=f"{company_name} {label}.pdf",
+                    mime=PDF_MIME_TYPE
+                )
+        else:
+            st.error(f"{report_name} not found. Please generate the report first.")
+
+    # For the custom report
+    custom_report_name = f"{company_name} report.pdf"
+    report_path = workspace.path(REPORT)
+    if os.path.exists(report_path):
+        with open(report_path, "rb") as report_file:
+            st.download_button(
+                label=f"Download {company_name} Report",
+                data=report_file,
+                file_name=custom_report_name,
+                mime=PDF_MIME_TYPE
+            )
+    else:
+        st.error(f"{report_path} not found. Please generate the report first.")
 
 # Initialize session state variables to track process
 if "report_generated" not in st.session_state:
     st.session_state.report_generated = False
 if "analysis_in_progress" not in st.session_state:
     st.session_state.analysis_in_progress = False
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
 
 # Streamlit Title and File Upload
 st.title("Product vs Competitor Image Analysis")
@@ -90,75 +119,64 @@ if st.button("Generate"):
                 st.session_state.analysis_in_progress = True  # mark as in progress
                 st.subheader("Product Images vs Competitor Images")
 
+                # Every report gets its own workspace, so concurrent users never share files
+                workspace = job_workspace.create()
+                product_images_dir = workspace.makedirs(PRODUCT_IMAGES_DIR)
+                competitor_images_dir = workspace.makedirs(COMPETITOR_IMAGES_DIR)
+
                 # Save images to respective directories
                 for idx, img_file in enumerate(product_images):
                     img = Image.open(img_file)
                     if img.mode == "RGBA":
                         img = img.convert("RGB")
-                    img.save(os.path.join(PRODUCT_IMAGES_DIR, f"image{idx + 1}.jpeg"), "JPEG")
+                    img.save(os.path.join(product_images_dir, f"image{idx + 1}.jpeg"), "JPEG")
 
                 for idx, img_file in enumerate(competitor_images):
                     img = Image.open(img_file)
                     if img.mode == "RGBA":
                         img = img.convert("RGB")
-                    img.save(os.path.join(COMPETITOR_IMAGES_DIR, f"image{idx + 1}.jpeg"), "JPEG")
+                    img.save(os.path.join(competitor_images_dir, f"image{idx + 1}.jpeg"), "JPEG")
 
                 try:
-                    # Initialize status file with "pending"
-                    with open(STATUS_FILE, "w") as f:
-                        f.write("pending")
-
-                    # Execute the analysis script asynchronously
-                    subprocess.Popen(['python', 'src/analysis.py', company_name])
-
-                    # Monitor the status file
-                    st.info("Running analysis. Please wait...")
-                    status = check_status_file()
-
-                    if status == "success":
-                        st.success("Analysis completed successfully!")
-                        st.session_state.report_generated = True  # mark as generated
-
-                        # Download Buttons for Generated PDF Reports
-                        for report_name, label in [
-                            (BRAND_MARKETING, f"{company_name} Brand Marketing Report"),
-                            (CONTENT_MARKETING, f"{company_name} Content Marketing Report"),
-                            (SOCIAL_MEDIA_MARKETING, f"{company_name} Social Media Marketing Report")
-                        ]:
-                            if os.path.exists(report_name):
-                                with open(report_name, "rb") as report_file:
-                                    st.download_button(
-                                        label=f"Download {label}",
-                                        data=report_file,
-                                        file_name=f"{company_name} {label}.pdf",
-                                        mime=PDF_MIME_TYPE
-                                    )
-                            else:
-                                st.error(f"{report_name} not found. Please generate the report first.")
-                        
-                        # For the custom report
-                        custom_report_name = f"{company_name} report.pdf"
-                        if os.path.exists(REPORT):
-                            with open(REPORT, "rb") as report_file:
-                                st.download_button(
-                                    label=f"Download {company_name} Report",
-                                    data=report_file,
-                                    file_name=custom_report_name,
-                                    mime=PDF_MIME_TYPE
-                                )
-                        else:
-                            st.error(f"{REPORT} not found. Please generate the report first.")
-                    elif status == "timeout":
-                        st.error("Analysis timed out. Please try again.")
-                    else:
-                        st.error(f"Analysis script failed: {status}")
+                    # Queue the report for the long-lived worker; the status is polled below
+                    st.session_state.job_id = job_queue.submit(company_name, workspace=workspace.root)
+                    st.session_state.job_workspace = workspace.root
+                    st.session_state.job_company_name = company_name
+                    ensure_worker()
                 except Exception as e:
                     st.error(f"Error running analysis script: {e}")
-                finally:
                     st.session_state.analysis_in_progress = False  # reset the flag
             else:
                 st.warning("Please enter your company name.")
         else:
             st.warning("Please upload exactly 6 images for both products and competitors before generating.")
+    elif st.session_state.analysis_in_progress:
+        st.info("A report is already being generated for this session.")
     else:
         st.info("Report has already been generated for this session.")
+
+# Monitor the submitted job without blocking the session: every rerun checks it once
+if st.session_state.job_id is not None:
+    job = job_queue.get(st.session_state.job_id)
+    status = job["status"] if job is not None else "missing"
+    workspace = job_workspace.Workspace(st.session_state.job_workspace)
+
+    if status == "queued":
+        ensure_worker()
+        st.info("Report queued. Waiting for the report worker...")
+    elif status == "running":
+        st.info("Running analysis. Please wait...")
+    elif status == "done":
+        st.success("Analysis completed successfully!")
+        st.session_state.report_generated = True  # mark as generated
+        st.session_state.analysis_in_progress = False
+        show_downloads(workspace, st.session_state.job_company_name)
+    else:
+        message = job["message"] if job is not None else "the job is no longer in the queue"
+        st.error(f"Analysis script failed: {message}")
+        st.session_state.analysis_in_progress = False  # reset the flag
+        st.session_state.job_id = None
+
+    if status in ("queued", "running"):
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
@@ -0,0 +1,109 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "input_analysis"))
+import Standarddeviation
+
+CRITERIA = list(dict.fromkeys(
+    criterion for criteria in Standarddeviation.category_criteria.values() for criterion in criteria
+))
+
+# Function to build a score table with some missing scores (they use the criterion means)
+def score_table(rng, prefix, count, missing=0.2):
+    scores = rng.integers(0, 11, size=(count, len(CRITERIA))).astype(float)
+    scores[rng.random(scores.shape) < missing] = np.nan
+    data = pd.DataFrame(scores, columns=CRITERIA)
+    data.insert(0, "Image", [f"{prefix}{i}.jpeg" for i in range(count)])
+    return data
+
+def score_dict(rng, missing=0.3):
+    return {
+        criterion: (np.nan if rng.random() < missing else float(rng.integers(0, 11)))
+        for criterion in CRITERIA
+    }
+
+class IncrementalSDMatrixTest(unittest.TestCase):
+    """Every update must give the same matrices as a full calculate_sd_comparison_matrices run."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+        self.product_data = score_table(self.rng, "product", 6)
+        self.competitor_data = score_table(self.rng, "competitor", 5)
+        self.matrix = Standarddeviation.IncrementalSDMatrix(self.product_data, self.competitor_data)
+
+    def set_row(self, data, image, scores):
+        row = pd.DataFrame([{"Image": image, **scores}], columns=data.columns)
+        if image in set(data["Image"]):
+            data = data.copy()
+            data.loc[data["Image"] == image, CRITERIA] = row[CRITERIA].to_numpy()
+            return data
+        return pd.concat([data, row], ignore_index=True)
+
+    def assert_matches_full_recompute(self):
+        expected = Standarddeviation.calculate_sd_comparison_matrices(
+            self.product_data, self.competitor_data, self.matrix.categories
+        )
+        for category, sd_matrix in expected.items():
+            pd.testing.assert_frame_equal(self.matrix.sd_matrix(category), sd_matrix, check_exact=False)
+
+    def test_initial_matrices(self):
+        self.assert_matches_full_recompute()
+
+    def test_set_and_replace_product(self):
+        for image in ("product_new.jpeg", "product2.jpeg"):
+            scores = score_dict(self.rng)
+            self.matrix.set_product(image, scores)
+            self.product_data = self.set_row(self.product_data, image, scores)
+            self.assert_matches_full_recompute()
+
+    def test_set_and_replace_competitor(self):
+        for image in ("competitor_new.jpeg", "competitor1.jpeg"):
+            scores = score_dict(self.rng)
+            self.matrix.set_competitor(image, scores)
+            self.competitor_data = self.set_row(self.competitor_data, image, scores)
+            self.assert_matches_full_recompute()
+
+    def test_remove_posts(self):
+        self.matrix.remove_product("product3.jpeg")
+        self.product_data = self.product_data[self.product_data["Image"] != "product3.jpeg"].reset_index(drop=True)
+        self.assert_matches_full_recompute()
+
+        self.matrix.remove_competitor("competitor0.jpeg")
+        self.competitor_data = self.competitor_data[
+            self.competitor_data["Image"] != "competitor0.jpeg"
+        ].reset_index(drop=True)
+        self.assert_matches_full_recompute()
+
+    def test_random_updates(self):
+        for step in range(40):
+            action = self.rng.integers(0, 4)
+            if action == 0:
+                image = f"product{self.rng.integers(0, 9)}.jpeg"
+                scores = score_dict(self.rng)
+                self.matrix.set_product(image, scores)
+                self.product_data = self.set_row(self.product_data, image, scores)
+            elif action == 1:
+                image = f"competitor{self.rng.integers(0, 8)}.jpeg"
+                scores = score_dict(self.rng)
+                self.matrix.set_competitor(image, scores)
+                self.competitor_data = self.set_row(self.competitor_data, image, scores)
+            elif action == 2 and len(self.product_data) > 1:
+                image = self.product_data["Image"].iloc[self.rng.integers(0, len(self.product_data))]
+                self.matrix.remove_product(image)
+                self.product_data = self.product_data[self.product_data["Image"] != image].reset_index(drop=True)
+            elif action == 3 and len(self.competitor_data) > 1:
+                image = self.competitor_data["Image"].iloc[self.rng.integers(0, len(self.competitor_data))]
+                self.matrix.remove_competitor(image)
+                self.competitor_data = self.competitor_data[
+                    self.competitor_data["Image"] != image
+                ].reset_index(drop=True)
+            with self.subTest(step=step):
+                self.assert_matches_full_recompute()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "input_analysis"))
+import Standarddeviation
+
+CRITERIA = list(dict.fromkeys(
+    criterion for criteria in Standarddeviation.category_criteria.values() for criterion in criteria
+))
+
+# Function to build a score table with continuous scores (no SD ties) and some missing ones
+def score_table(rng, prefix, count, missing=0.2):
+    scores = rng.random((count, len(CRITERIA))) * 10
+    scores[rng.random(scores.shape) < missing] = np.nan
+    data = pd.DataFrame(scores, columns=CRITERIA)
+    data.insert(0, "Image", [f"{prefix}{i}.jpeg" for i in range(count)])
+    return data
+
+# Function to compute one SD matrix pair by pair, the way the original script did
+def reference_sd_matrix(product_data, competitor_data, criteria):
+    sd_matrix = np.zeros((len(product_data), len(competitor_data)))
+    if not criteria:
+        return sd_matrix
+    combined = pd.concat([product_data[criteria], competitor_data[criteria]])
+    for i in range(len(product_data)):
+        for j in range(len(competitor_data)):
+            score_diff = (product_data.iloc[i][criteria].values - competitor_data.iloc[j][criteria].values).astype(float)
+            for k, diff in enumerate(score_diff):
+                if np.isnan(diff):
+                    score_diff[k] = np.nanmean(combined[criteria[k]].dropna().values)
+            sd_matrix[i, j] = np.std(score_diff)
+    return sd_matrix
+
+# Function to pick pairs by sorting every cell, the way the original script did
+def reference_pairs(sd_values, top_count):
+    n_competitor = sd_values.shape[1]
+    cells = sorted(range(sd_values.size), key=lambda flat: (-sd_values.flat[flat], flat))
+    used_rows, used_columns, pairs = set(), set(), []
+    for flat in cells:
+        i, j = divmod(flat, n_competitor)
+        if i not in used_rows and j not in used_columns:
+            pairs.append((i, j))
+            used_rows.add(i)
+            used_columns.add(j)
+        if len(pairs) == top_count:
+            break
+    return pairs
+
+
+class SDMatrixTest(unittest.TestCase):
+    """The vectorized matrices must match the per-pair computation they replaced."""
+
+    def test_matches_per_pair_computation(self):
+        rng = np.random.default_rng(3)
+        product_data = score_table(rng, "product", 6)
+        competitor_data = score_table(rng, "competitor", 5)
+        categories = dict(Standarddeviation.category_criteria, Empty=[])
+        sd_matrices = Standarddeviation.calculate_sd_comparison_matrices(product_data, competitor_data, categories)
+        for category, criteria in categories.items():
+            with self.subTest(category=category):
+                np.testing.assert_allclose(
+                    sd_matrices[category].to_numpy(), reference_sd_matrix(product_data, competitor_data, criteria)
+                )
+
+
+class StreamingTopPairsTest(unittest.TestCase):
+    """Streaming in small blocks must select the same pairs as the dense path."""
+
+    def test_matches_dense_selection(self):
+        rng = np.random.default_rng(5)
+        product_data = score_table(rng, "product", 23)
+        competitor_data = score_table(rng, "competitor", 17)
+        categories = Standarddeviation.category_criteria
+
+        expected = []
+        for category, sd_matrix in Standarddeviation.calculate_sd_comparison_matrices(
+            product_data, competitor_data, categories
+        ).items():
+            expected += Standarddeviation.find_top_non_repetitive_sd(sd_matrix, product_data, competitor_data, category)
+
+        # A few competitor posts per block, so the candidates are merged many times
+        block_bytes = 3 * len(product_data) * len(CRITERIA) * 4
+        streamed = Standarddeviation.find_top_sd_pairs_streaming(
+            product_data, competitor_data, categories, block_bytes=block_bytes
+        )
+        self.assertEqual([row[:3] for row in streamed], [row[:3] for row in expected])
+        np.testing.assert_allclose([row[3] for row in streamed], [row[3] for row in expected], rtol=1e-5)
+
+
+class GreedySelectionTest(unittest.TestCase):
+    """select_pairs_greedy must match a greedy walk over every cell sorted by SD."""
+
+    def test_matches_brute_force_sort(self):
+        rng = np.random.default_rng(11)
+        for shape in [(1, 1), (2, 7), (6, 6), (9, 4), (30, 25)]:
+            for top_count in (1, 3, 10):
+                # Integer values, so ties must also be broken the same way (row-major)
+                sd_values = rng.integers(0, 5, size=shape).astype(float)
+                with self.subTest(shape=shape, top_count=top_count):
+                    self.assertEqual(
+                        Standarddeviation.select_pairs_greedy(sd_values, top_count),
+                        reference_pairs(sd_values, top_count)
+                    )
+
+    def test_nan_cells_come_last(self):
+        sd_values = np.array([[np.nan, 1.0], [2.0, np.nan]])
+        sd_matrix = pd.DataFrame(sd_values)
+        product_data = pd.DataFrame({"Image": ["p0", "p1"]})
+        competitor_data = pd.DataFrame({"Image": ["c0", "c1"]})
+        pairs = Standarddeviation.find_top_non_repetitive_sd(sd_matrix, product_data, competitor_data, "Category")
+        self.assertEqual([row[1:3] for row in pairs], [("p1", "c0"), ("p0", "c1")])
+
+
+if __name__ == "__main__":
+    unittest.main()